@@ -0,0 +1,185 @@
+# ==================================================================================================
+# --- Imports
+# ==================================================================================================
+import io
+import json
+
+import numpy as np
+import pandas as pd
+from flask import Blueprint, Response, abort, request
+
+# Import functions to load the full-precision dataframes
+import artifacts
+
+# Arrow IPC is only available if pyarrow is installed
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+"""This module defines a read-only data API on the Flask server of the dashboard, returning the
+columns of the stored variables of the current collider (twiss, survey, separation, footprints,
+etc.) as .npz or Arrow IPC bytes. The variables are addressed by their path in the dictionnary of
+variables, e.g.:
+    /api/with_bb/df_tw_b1?columns=s,betx&start=0&stop=1000&format=arrow
+    /api/without_bb/dic_sep_IPs/v/ip1?format=npz
+    /api/with_bb/footprint_b1
+The numeric columns are served from the memory-mapped artifacts, without intermediate copies
+(Arrow IPC). See client.py for a Python helper.
+"""
+
+# Beam-beam states that can be requested
+L_STATES = ["with_bb", "without_bb"]
+
+# Mimetype of each format
+DIC_MIMETYPES = {
+    "npz": "application/octet-stream",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+
+# ==================================================================================================
+# --- Functions to get the columns of a variable
+# ==================================================================================================
+def return_value_from_path(dic, key_path):
+    """Return the variable at a given path (e.g. "dic_sep_IPs/v/ip1") in a dictionnary of
+    variables. The top-level dataframes are loaded in full precision."""
+    l_keys = key_path.strip("/").split("/")
+    value = artifacts.return_full_precision(dic, l_keys[0])
+    for key in l_keys[1:]:
+        if isinstance(value, dict):
+            value = value[key]
+        elif isinstance(value, (tuple, list)):
+            value = value[int(key)]
+        else:
+            raise KeyError(key)
+    return value
+
+
+def return_columns(value):
+    """Return the columns of a variable as a dictionnary of 1D (or more) arrays. Dataframes give
+    their columns (except the internal ones), dictionnaries their array-like items, tuples and
+    lists their items (named by position), and arrays a single "values" column."""
+    if isinstance(value, pd.DataFrame):
+        return {
+            str(column): value[column].to_numpy()
+            for column in value.columns
+            if column not in artifacts.L_COLUMNS_INTERNAL
+        }
+    elif isinstance(value, pd.Series):
+        return {"values": value.to_numpy()}
+    elif isinstance(value, dict):
+        return {
+            str(key): np.asarray(x)
+            for key, x in value.items()
+            if isinstance(x, (np.ndarray, pd.Series, list, float, int))
+        }
+    elif isinstance(value, (tuple, list)):
+        return {str(idx): np.asarray(x) for idx, x in enumerate(value)}
+    elif isinstance(value, np.ndarray):
+        return {"values": value}
+    else:
+        raise TypeError(f"Variables of type {type(value)} can't be served as columns.")
+
+
+def return_npz_bytes(dic_columns):
+    """Return the columns as the bytes of a .npz file. The object columns (e.g. the element names)
+    are converted to strings, so that the file can be loaded without pickle."""
+    buffer = io.BytesIO()
+    np.savez(
+        buffer,
+        **{
+            column: array.astype(str) if array.dtype.kind == "O" else array
+            for column, array in dic_columns.items()
+        },
+    )
+    return buffer.getvalue()
+
+
+def return_arrow_bytes(dic_columns):
+    """Return the columns as an Arrow IPC stream. The columns must all be 1D, with the same
+    length."""
+    for column, array in dic_columns.items():
+        if array.ndim != 1:
+            raise ValueError(
+                f"Arrow IPC requires 1D columns, but {column} has {array.ndim} dimensions, use npz"
+                " instead."
+            )
+    l_lengths = {len(array) for array in dic_columns.values()}
+    if len(l_lengths) > 1:
+        raise ValueError("Arrow IPC requires columns of the same length, use npz instead.")
+
+    # Numeric arrays are wrapped without copy
+    batch = pa.RecordBatch.from_pydict(
+        {
+            column: pa.array(array) if array.dtype.kind in "biuf" else pa.array(array.astype(str))
+            for column, array in dic_columns.items()
+        }
+    )
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, batch.schema) as writer:
+        writer.write_batch(batch)
+    return sink.getvalue().to_pybytes()
+
+
+# ==================================================================================================
+# --- Blueprint
+# ==================================================================================================
+def return_api_blueprint(return_dic):
+    """Return the blueprint of the data API. return_dic is a function returning the dictionnary of
+    variables of the current collider for a given beam-beam state ("with_bb" or "without_bb")."""
+    blueprint = Blueprint("api", __name__)
+
+    @blueprint.route("/api/<state>")
+    def list_variables(state):
+        if state not in L_STATES:
+            abort(404)
+        return Response(json.dumps(list(return_dic(state).keys())), mimetype="application/json")
+
+    @blueprint.route("/api/<state>/<path:key_path>")
+    def get_variable(state, key_path):
+        if state not in L_STATES:
+            abort(404)
+
+        # Get the requested format
+        format_api = request.args.get("format", "npz").lower()
+        if format_api not in DIC_MIMETYPES:
+            abort(400, f"Unknown format {format_api}, must be one of {list(DIC_MIMETYPES)}.")
+        if format_api == "arrow" and pa is None:
+            abort(501, "Arrow IPC requires pyarrow, which is not installed.")
+
+        # Get the columns of the variable
+        try:
+            dic_columns = return_columns(return_value_from_path(return_dic(state), key_path))
+        except (KeyError, IndexError, ValueError):
+            abort(404, f"No variable {key_path}.")
+        except TypeError as e:
+            abort(400, str(e))
+
+        # Select the requested columns and rows (slices of memory-mapped arrays are not copied)
+        if request.args.get("columns"):
+            l_columns = request.args["columns"].split(",")
+            l_unknown = [column for column in l_columns if column not in dic_columns]
+            if len(l_unknown) > 0:
+                abort(400, f"Unknown columns: {l_unknown}.")
+            dic_columns = {column: dic_columns[column] for column in l_columns}
+        start = request.args.get("start", type=int)
+        stop = request.args.get("stop", type=int)
+        if start is not None or stop is not None:
+            dic_columns = {
+                column: array[start:stop] if array.ndim > 0 else array
+                for column, array in dic_columns.items()
+            }
+
+        match format_api:
+            case "npz":
+                data = return_npz_bytes(dic_columns)
+            case "arrow":
+                try:
+                    data = return_arrow_bytes(dic_columns)
+                except ValueError as e:
+                    abort(400, str(e))
+
+        return Response(data, mimetype=DIC_MIMETYPES[format_api])
+
+    return blueprint
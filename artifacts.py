@@ -0,0 +1,715 @@
+# ==================================================================================================
+# --- Imports
+# ==================================================================================================
+import contextlib
+import fcntl
+import gc
+import hashlib
+import io
+import json
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import weakref
+from collections.abc import Mapping
+
+import numpy as np
+import pandas as pd
+
+"""This module stores the dashboard variables of a collider (before and after beam-beam) in an
+artifact directory, and loads them back lazily:
+- the numeric columns of the dataframes, as well as the numeric arrays, are stored as .npy chunks,
+  which are memory-mapped when loaded. The dataframes are loaded in a compact form by default
+  (float32 copies of the float64 columns read by the figures), the full precision being loaded
+  only on request
+- the string columns of the dataframes (e.g. the element names) are stored as categoricals, so
+  that each name is only held once in memory
+- the dataframe columns holding a 1D array per row (e.g. knl) are split into numeric columns
+  (knl_0, knl_1, etc.), while those holding higher-dimensional arrays (e.g. W_matrix) are stacked
+  into a single (N, ...) array in cold storage, only loaded on explicit request
+- the small values (scalars, strings, etc.) are stored directly in the index file
+- anything else is pickled in a separate chunk
+Each variable is only loaded the first time it is accessed.
+
+The chunks are content-addressed and shared by all the artifacts, in a chunk store next to them: a
+column or an array that is identical between several colliders (e.g. the points of an optics scan)
+is only written once, and only loaded once in memory. The artifact directory itself only contains
+the index (manifest) of the variables.
+
+The artifacts are named from a hash of the content of the collider (and configuration) files and of
+the schema version, so that a modified collider is never served from a stale artifact. They are
+written in a temporary directory which is then atomically renamed, under a lock preventing two
+workers from computing the same artifact.
+"""
+
+# Version of the layout of the artifact directories (part of the artifact keys)
+SCHEMA_VERSION = 5
+
+# Directory containing the artifacts
+PATH_ARTIFACTS = "temp/"
+
+# Name of the index file of an artifact
+NAME_INDEX = "index.json"
+
+# Name of the chunk store, in the directory containing the artifacts
+NAME_CHUNKS = "chunks"
+
+# Name of the directory of the references from the source files (and options) to their artifact, in
+# the directory containing the artifacts (see return_path_artifact_from_sources)
+NAME_REFERENCES = "references"
+
+# Float64 columns of the dataframes read by the figures, also stored as float32 copies for the
+# compact form (the split knl columns are added from their prefix)
+L_COLUMNS_COMPACT = ["s", "X", "Y", "Z", "theta", "x", "y", "betx", "bety", "dx", "dy", "length"]
+PREFIX_COLUMNS_COMPACT = "knl_"
+
+# Columns of the dataframes only used internally (e.g. the element families), which are not shown in
+# the tables, nor served by the export and the data API
+L_COLUMNS_INTERNAL = ["family"]
+
+# Strings longer than this are stored in a chunk rather than in the index file
+SIZE_MAX_INLINE_STRING = 4096
+
+# Chunks currently in memory (shared between all the loaded artifacts)
+_dic_chunks_in_memory = weakref.WeakValueDictionary()
+
+# ==================================================================================================
+# --- Functions to get the artifact paths
+# ==================================================================================================
+
+
+def return_artifact_key(l_paths, dic_options=None):
+    """Return the key of the artifact computed from the given files, as a hash of their content, of
+    the options of the computation (e.g. compute_fma) and of the schema version."""
+    sha = hashlib.sha256(f"schema_version_{SCHEMA_VERSION}".encode())
+    if dic_options is not None:
+        sha.update(json.dumps(dic_options, sort_keys=True).encode())
+    for path in l_paths:
+        sha.update(b"\0")
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(2**20), b""):
+                sha.update(chunk)
+    return sha.hexdigest()[:32]
+
+
+def _return_l_paths_sources(path_config=None, path_collider=None):
+    """Return the source files of an artifact: the configuration file and/or the collider json
+    file."""
+    return [path for path in [path_config, path_collider] if path is not None]
+
+
+def _return_path_reference(l_paths, dic_options=None):
+    """Return the path of the reference to the artifact of some source files (and options), named
+    from a hash of the paths (but not of the content) of the files."""
+    str_sources = json.dumps(
+        [SCHEMA_VERSION, [os.path.abspath(path) for path in l_paths], dic_options], sort_keys=True
+    )
+    return os.path.join(
+        PATH_ARTIFACTS,
+        NAME_REFERENCES,
+        hashlib.sha256(str_sources.encode()).hexdigest()[:32] + ".json",
+    )
+
+
+def _return_l_stats_sources(l_paths):
+    """Return the size and mtime of the source files, or None if one of them can't be accessed."""
+    try:
+        return [[os.stat(path).st_size, os.stat(path).st_mtime_ns] for path in l_paths]
+    except OSError:
+        return None
+
+
+def dump_artifact_reference(path_artifact, l_paths, dic_options=None):
+    """Store the reference from some source files (and options) to their artifact, along with the
+    size and mtime of the files."""
+    path_reference = _return_path_reference(l_paths, dic_options)
+    os.makedirs(os.path.dirname(path_reference), exist_ok=True)
+    fd, path_temp = tempfile.mkstemp(dir=os.path.dirname(path_reference), prefix=".tmp_")
+    with os.fdopen(fd, "w") as f:
+        json.dump({"path_artifact": path_artifact, "stats": _return_l_stats_sources(l_paths)}, f)
+    os.replace(path_temp, path_reference)
+
+
+def return_path_artifact_from_sources(l_paths, dic_options=None, use_reference=False):
+    """Return the path of the artifact directory of some source files, computed with the given
+    options. If use_reference is True, the artifact is resolved from the reference stored when it
+    was written, without reading the source files, as long as they are unchanged (same size and
+    mtime) or can't be accessed (e.g. when serving the dashboard away from the job directories).
+    Otherwise, or without a valid reference, the path is computed from a hash of the content of
+    the files (and the reference to an existing artifact is stored for the next time)."""
+    if use_reference:
+        try:
+            with open(_return_path_reference(l_paths, dic_options), "r") as f:
+                dic_reference = json.load(f)
+            l_stats = _return_l_stats_sources(l_paths)
+            if artifact_exists(dic_reference["path_artifact"]) and (
+                l_stats is None or l_stats == dic_reference["stats"]
+            ):
+                return dic_reference["path_artifact"]
+        except (OSError, ValueError, KeyError):
+            pass
+
+    path_artifact = os.path.join(
+        PATH_ARTIFACTS, "artifact_" + return_artifact_key(l_paths, dic_options)
+    )
+    if use_reference and artifact_exists(path_artifact):
+        dump_artifact_reference(path_artifact, l_paths, dic_options)
+    return path_artifact
+
+
+def return_path_artifact_from_collider(path_collider, dic_options=None, use_reference=False):
+    """Return the path of the artifact directory of a given collider json file, computed with the
+    given options (see return_path_artifact_from_sources)."""
+    return return_path_artifact_from_sources(
+        _return_l_paths_sources(path_collider=path_collider), dic_options, use_reference
+    )
+
+
+def return_path_artifact_from_config(
+    path_config, path_collider=None, dic_options=None, use_reference=False
+):
+    """Return the path of the artifact directory of a given generation 2 configuration file (and
+    the corresponding collider json file, if it's not built from the configuration), computed with
+    the given options (see return_path_artifact_from_sources)."""
+    return return_path_artifact_from_sources(
+        _return_l_paths_sources(path_config, path_collider), dic_options, use_reference
+    )
+
+
+def return_artifact_label(path_collider=None, path_config=None):
+    """Return a short label for an artifact, from the job directory of its source file."""
+    path_source = path_config if path_config is not None else path_collider
+    if path_source is None:
+        return None
+    return "/".join(os.path.dirname(os.path.abspath(path_source)).split("/")[-3:])
+
+
+@contextlib.contextmanager
+def artifact_lock(path_artifact):
+    """Context manager holding an exclusive lock on an artifact, so that only one worker computes
+    (and writes) it at a time."""
+    os.makedirs(os.path.dirname(path_artifact) or ".", exist_ok=True)
+    with open(path_artifact + ".lock", "w") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def artifact_exists(path_artifact):
+    """Check if an artifact (or a legacy pickle file) exists at the given path."""
+    if path_artifact.endswith(".pkl"):
+        return os.path.isfile(path_artifact)
+    return os.path.isfile(os.path.join(path_artifact, NAME_INDEX))
+
+
+# ==================================================================================================
+# --- Functions to handle the chunk store
+# ==================================================================================================
+def _return_path_chunks(path_artifact):
+    """Return the path of the chunk store used by an artifact."""
+    return os.path.join(os.path.dirname(os.path.normpath(path_artifact)), NAME_CHUNKS)
+
+
+def _return_path_chunk(path_chunks, chunk_id):
+    """Return the path of a chunk in the chunk store."""
+    return os.path.join(path_chunks, chunk_id[:2], chunk_id)
+
+
+def _write_chunk(path_chunks, data, extension):
+    """Write some bytes in the chunk store (if they're not already there), and return the id of
+    the chunk."""
+    chunk_id = hashlib.sha256(data).hexdigest() + extension
+    path_chunk = _return_path_chunk(path_chunks, chunk_id)
+    try:
+        # Refresh the mtime of an existing chunk, so that it's not removed as unused while the
+        # artifact referencing it is being written (see remove_unused_chunks)
+        os.utime(path_chunk)
+    except FileNotFoundError:
+        # Write in a temporary file first, in case another worker writes the same chunk
+        os.makedirs(os.path.dirname(path_chunk), exist_ok=True)
+        fd, path_temp = tempfile.mkstemp(dir=os.path.dirname(path_chunk), prefix=".tmp_")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(path_temp, path_chunk)
+    return chunk_id
+
+
+def _write_array_chunk(path_chunks, array):
+    """Write an array in the chunk store, and return the id of the chunk."""
+    buffer = io.BytesIO()
+    np.save(buffer, np.ascontiguousarray(array), allow_pickle=False)
+    return _write_chunk(path_chunks, buffer.getvalue(), ".npy")
+
+
+def _write_pickle_chunk(path_chunks, value):
+    """Pickle a value in the chunk store, and return the id of the chunk."""
+    return _write_chunk(path_chunks, pickle.dumps(value), ".pkl")
+
+
+def _load_array_chunk(path_chunks, chunk_id):
+    """Return the (memory-mapped) array of a chunk, reusing it if it's already in memory."""
+    array = _dic_chunks_in_memory.get(chunk_id)
+    if array is None:
+        array = np.load(_return_path_chunk(path_chunks, chunk_id), mmap_mode="r")
+        _dic_chunks_in_memory[chunk_id] = array
+    return array
+
+
+def _load_pickle_chunk(path_chunks, chunk_id):
+    """Return the value pickled in a chunk."""
+    with open(_return_path_chunk(path_chunks, chunk_id), "rb") as f:
+        return pickle.load(f)
+
+
+def _return_chunk_ids(entry):
+    """Return the ids of all the chunks referenced in an entry of an index."""
+    if isinstance(entry, dict):
+        return {
+            chunk_id
+            for key, x in entry.items()
+            for chunk_id in ([x] if key.startswith("chunk") else _return_chunk_ids(x))
+        }
+    if isinstance(entry, list):
+        return {chunk_id for x in entry for chunk_id in _return_chunk_ids(x)}
+    return set()
+
+
+def remove_unused_chunks(path_artifacts=PATH_ARTIFACTS, min_age=3600):
+    """Remove the chunks that are not referenced by any artifact anymore, and return the number of
+    chunks removed. Only chunks written or reused more than min_age (in seconds) ago are removed,
+    as they may belong to an artifact being written."""
+    path_chunks = os.path.join(path_artifacts, NAME_CHUNKS)
+    if not os.path.isdir(path_chunks):
+        return 0
+
+    # Get the chunks used by all the artifacts
+    set_chunks_used = set()
+    for x in os.listdir(path_artifacts):
+        path_artifact = os.path.join(path_artifacts, x)
+        if os.path.isdir(path_artifact) and artifact_exists(path_artifact):
+            with open(os.path.join(path_artifact, NAME_INDEX), "r") as f:
+                set_chunks_used |= _return_chunk_ids(json.load(f))
+
+    n_removed = 0
+    for root, _, l_files in os.walk(path_chunks):
+        for chunk_id in l_files:
+            path_chunk = os.path.join(root, chunk_id)
+            if chunk_id in set_chunks_used or time.time() - os.path.getmtime(path_chunk) < min_age:
+                continue
+            os.remove(path_chunk)
+            n_removed += 1
+    return n_removed
+
+
+# ==================================================================================================
+# --- Functions to dump the variables
+# ==================================================================================================
+def _is_json_value(value):
+    """Check if a value can be stored directly in the index file."""
+    if value is None or isinstance(value, (bool, int, float)):
+        return True
+    if isinstance(value, str):
+        return len(value) <= SIZE_MAX_INLINE_STRING
+    if isinstance(value, list):
+        return all(_is_json_value(x) for x in value)
+    return False
+
+
+def _return_storable_array(series):
+    """Return the values of a column as an array that can be stored as a .npy chunk, or None if
+    the column must be pickled."""
+    if series.dtype.kind in "biufcmM":
+        return series.to_numpy()
+    return None
+
+
+def _is_string_column(series):
+    """Check if a column only holds strings, and can be stored as a categorical."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return all(isinstance(x, str) for x in series.cat.categories)
+    return series.dtype.kind == "O" and all(isinstance(x, str) for x in series)
+
+
+def _return_stacked_array(series):
+    """Stack a column holding a numeric array (or a scalar) per row into a single float array of
+    shape (N, ...). 1D arrays of different lengths are padded with zeros, and scalar rows are
+    broadcasted. Returns None if the column can't be stacked."""
+    l_values = []
+    for x in series:
+        if isinstance(x, (int, float, np.number)):
+            l_values.append(float(x))
+        elif isinstance(x, (np.ndarray, list, tuple)):
+            x = np.asarray(x)
+            if x.dtype.kind not in "biuf" or x.ndim == 0:
+                return None
+            l_values.append(x.astype(float))
+        else:
+            return None
+
+    # Get the shape of the stacked rows
+    l_shapes = [x.shape for x in l_values if isinstance(x, np.ndarray)]
+    if len(l_shapes) == 0 or len({len(shape) for shape in l_shapes}) > 1:
+        return None
+    if len(l_shapes[0]) == 1:
+        shape = (max(shape[0] for shape in l_shapes),)
+    elif len(set(l_shapes)) == 1:
+        shape = l_shapes[0]
+    else:
+        return None
+
+    array = np.zeros((len(l_values),) + shape)
+    for idx, x in enumerate(l_values):
+        if isinstance(x, np.ndarray):
+            array[(idx,) + tuple(slice(0, n) for n in x.shape)] = x
+        else:
+            array[idx] = x
+    return array
+
+
+def _is_compact_column(name):
+    """Return True if a float64 column is read by the figures (and must have a float32 copy)."""
+    return name in L_COLUMNS_COMPACT or str(name).startswith(PREFIX_COLUMNS_COMPACT)
+
+
+def _dump_array_column(array, path_chunks, name):
+    """Store a numeric column, along with a float32 copy of it if it's a float64 column read by the
+    figures (to be used in the compact form of the dataframe), and return the entry of the
+    column."""
+    entry_column = {"name": name, "kind": "npy", "chunk": _write_array_chunk(path_chunks, array)}
+    if array.dtype == np.float64 and _is_compact_column(name):
+        entry_column["chunk_compact"] = _write_array_chunk(path_chunks, array.astype(np.float32))
+    return entry_column
+
+
+def _dump_frame(df, path_chunks):
+    """Store each column of a dataframe in its own chunk, and return the entry of the
+    dataframe."""
+    l_columns = []
+    l_cold_columns = []
+    for column in df.columns:
+        if _is_string_column(df[column]):
+            if isinstance(df[column].dtype, pd.CategoricalDtype):
+                # Keep the categories (and therefore the codes) of the categorical columns
+                codes, categories = df[column].cat.codes.to_numpy(), df[column].cat.categories
+            else:
+                codes, categories = pd.factorize(df[column])
+            l_columns.append(
+                {
+                    "name": column,
+                    "kind": "categorical",
+                    "chunk": _write_array_chunk(path_chunks, codes.astype(np.int32)),
+                    "chunk_categories": _write_array_chunk(
+                        path_chunks, np.array(categories, dtype=str)
+                    ),
+                }
+            )
+            continue
+
+        array = _return_storable_array(df[column])
+        if array is not None:
+            l_columns.append(_dump_array_column(array, path_chunks, column))
+            continue
+
+        array = _return_stacked_array(df[column])
+        if array is not None and array.ndim == 2:
+            # Split 1D arrays into numeric columns
+            for i in range(array.shape[1]):
+                l_columns.append(_dump_array_column(array[:, i], path_chunks, f"{column}_{i}"))
+        elif array is not None:
+            # Higher-dimensional arrays are only loaded on request
+            l_cold_columns.append({"name": column, "chunk": _write_array_chunk(path_chunks, array)})
+        else:
+            l_columns.append(
+                {
+                    "name": column,
+                    "kind": "pickle",
+                    "chunk": _write_pickle_chunk(path_chunks, df[column].tolist()),
+                }
+            )
+
+    # Default indices are not stored
+    if isinstance(df.index, pd.RangeIndex) and df.index.start == 0 and df.index.step == 1:
+        index = {"kind": "range", "length": len(df)}
+    else:
+        index = {"kind": "npy", "chunk": _write_array_chunk(path_chunks, df.index.to_numpy())}
+
+    return {"kind": "frame", "columns": l_columns, "cold_columns": l_cold_columns, "index": index}
+
+
+def _dump_value(value, path_chunks):
+    """Store a value in the chunk store, and return its entry in the index."""
+    if isinstance(value, pd.DataFrame):
+        return _dump_frame(value, path_chunks)
+
+    elif isinstance(value, pd.Series):
+        entry = _dump_frame(value.to_frame(name="values"), path_chunks)
+        entry["kind"] = "series"
+        entry["name"] = value.name if _is_json_value(value.name) else None
+        return entry
+
+    elif isinstance(value, np.ndarray) and value.dtype.kind != "O":
+        return {"kind": "array", "chunk": _write_array_chunk(path_chunks, value)}
+
+    elif isinstance(value, np.generic) and _is_json_value(value.item()):
+        return {"kind": "value", "value": value.item()}
+
+    elif isinstance(value, dict) and all(isinstance(key, str) for key in value):
+        return {
+            "kind": "dict",
+            "items": {key: _dump_value(x, path_chunks) for key, x in value.items()},
+        }
+
+    elif isinstance(value, tuple) or (isinstance(value, list) and not _is_json_value(value)):
+        return {
+            "kind": "tuple" if isinstance(value, tuple) else "list",
+            "items": [_dump_value(x, path_chunks) for x in value],
+        }
+
+    elif _is_json_value(value):
+        return {"kind": "value", "value": value}
+
+    else:
+        return {"kind": "pickle", "chunk": _write_pickle_chunk(path_chunks, value)}
+
+
+def dump_artifact(path_artifact, dic_without_bb, dic_with_bb, dic_metadata=None):
+    """Store the dashboard variables before and after beam-beam in an artifact directory,
+    replacing any previous artifact at the same path. The metadata (e.g. the source paths and the
+    options) are stored in the index, and the artifact is referenced from its source files. The
+    chunks are written in the chunk store, while the index is written in a temporary directory,
+    then renamed."""
+    path_chunks = _return_path_chunks(path_artifact)
+    path_temp = tempfile.mkdtemp(
+        dir=os.path.dirname(path_artifact) or ".", prefix=".tmp_" + os.path.basename(path_artifact)
+    )
+    try:
+        dic_index = {
+            "schema_version": SCHEMA_VERSION,
+            "metadata": dic_metadata if dic_metadata is not None else {},
+            "states": {},
+        }
+        for state, dic in zip(["without_bb", "with_bb"], [dic_without_bb, dic_with_bb]):
+            dic_index["states"][state] = {
+                key: _dump_value(value, path_chunks) for key, value in dic.items()
+            }
+
+        # The index is written last, so that its presence marks a complete artifact
+        with open(os.path.join(path_temp, NAME_INDEX), "w") as f:
+            json.dump(dic_index, f)
+
+        # Move any previous artifact out of the way, and rename the new one
+        path_old = None
+        if os.path.isdir(path_artifact):
+            path_old = path_temp + "_old"
+            os.rename(path_artifact, path_old)
+        os.rename(path_temp, path_artifact)
+        if path_old is not None:
+            shutil.rmtree(path_old)
+    except BaseException:
+        shutil.rmtree(path_temp, ignore_errors=True)
+        raise
+
+    # Reference the artifact from its source files, so that it can be found without reading them
+    l_paths = _return_l_paths_sources(
+        dic_index["metadata"].get("path_config"), dic_index["metadata"].get("path_collider")
+    )
+    if len(l_paths) > 0:
+        dump_artifact_reference(path_artifact, l_paths, dic_index["metadata"].get("options"))
+
+
+# ==================================================================================================
+# --- Functions to load the variables
+# ==================================================================================================
+def _load_frame(entry, path_chunks, compact=True):
+    """Load a dataframe from its entry, memory-mapping the columns stored as .npy chunks. If
+    compact is True, the float64 columns read by the figures are loaded as float32."""
+    dic_columns = {}
+    for column in entry["columns"]:
+        chunk_id = column["chunk"]
+        if compact and "chunk_compact" in column:
+            chunk_id = column["chunk_compact"]
+
+        if column["kind"] == "npy":
+            dic_columns[column["name"]] = _load_array_chunk(path_chunks, chunk_id)
+        elif column["kind"] == "categorical":
+            dic_columns[column["name"]] = pd.Categorical.from_codes(
+                _load_array_chunk(path_chunks, chunk_id),
+                categories=_load_array_chunk(path_chunks, column["chunk_categories"]),
+            )
+        else:
+            dic_columns[column["name"]] = _load_pickle_chunk(path_chunks, chunk_id)
+
+    if entry["index"]["kind"] == "range":
+        index = pd.RangeIndex(entry["index"]["length"])
+    else:
+        index = _load_array_chunk(path_chunks, entry["index"]["chunk"])
+
+    # The columns are not copied, so that the chunks stay memory-mapped and shared
+    return pd.DataFrame(dic_columns, index=index, copy=False)
+
+
+def _load_value(entry, path_chunks, compact=True):
+    """Load a value from its entry in the index."""
+    match entry["kind"]:
+        case "frame":
+            return _load_frame(entry, path_chunks, compact)
+        case "series":
+            return _load_frame(entry, path_chunks, compact)["values"].rename(entry["name"])
+        case "array":
+            return _load_array_chunk(path_chunks, entry["chunk"])
+        case "dict":
+            return {key: _load_value(x, path_chunks, compact) for key, x in entry["items"].items()}
+        case "tuple":
+            return tuple(_load_value(x, path_chunks, compact) for x in entry["items"])
+        case "list":
+            return [_load_value(x, path_chunks, compact) for x in entry["items"]]
+        case "value":
+            return entry["value"]
+        case "pickle":
+            return _load_pickle_chunk(path_chunks, entry["chunk"])
+        case _:
+            raise ValueError(f"Unknown kind of entry: {entry['kind']}")
+
+
+class LazyArtifactDict(Mapping):
+    """Read-only dictionnary of the variables of an artifact (for a given beam-beam state). Each
+    variable is loaded from the chunk store (in compact form) the first time it is accessed, and
+    then kept in memory. The loading is thread-safe, as the dictionnary is shared by the requests
+    of the dashboard."""
+
+    def __init__(self, path_artifact, dic_entries):
+        self.path_artifact = path_artifact
+        self.path_chunks = _return_path_chunks(path_artifact)
+        self._dic_entries = dic_entries
+        self._dic_loaded = {}
+        self._lock = threading.Lock()
+        self._nbytes = (0, 0)
+
+    def __getitem__(self, key):
+        if key not in self._dic_loaded:
+            with self._lock:
+                if key not in self._dic_loaded:
+                    self._dic_loaded[key] = _load_value(self._dic_entries[key], self.path_chunks)
+        return self._dic_loaded[key]
+
+    def __iter__(self):
+        return iter(self._dic_entries)
+
+    def __len__(self):
+        return len(self._dic_entries)
+
+    def load_all(self):
+        """Load all the variables in memory."""
+        for key in self._dic_entries:
+            self[key]
+
+    def load_full_precision(self, key):
+        """Return the variable key with its dataframes in full precision. The result is not kept
+        in memory."""
+        return _load_value(self._dic_entries[key], self.path_chunks, compact=False)
+
+    def load_cold_column(self, key, column):
+        """Return the (memory-mapped) array of a column of the dataframe key kept in cold
+        storage, e.g. the (N, 6, 6) array of the W_matrix column of a twiss dataframe."""
+        for cold_column in self._dic_entries[key].get("cold_columns", []):
+            if cold_column["name"] == column:
+                return _load_array_chunk(self.path_chunks, cold_column["chunk"])
+        raise KeyError(f"No column {column} in cold storage for {key}.")
+
+    def return_nbytes(self):
+        """Return the size (in bytes) of the variables loaded so far. The size is only measured
+        again when new variables have been loaded."""
+        n_loaded, nbytes = self._nbytes
+        if n_loaded != len(self._dic_loaded):
+            l_values = list(self._dic_loaded.values())
+            self._nbytes = (len(l_values), sum(return_nbytes(value) for value in l_values))
+        return self._nbytes[1]
+
+
+def return_nbytes(value):
+    """Return the size (in bytes) of the arrays and dataframes of a value, recursively. Other
+    objects are only counted by their shallow size."""
+    if isinstance(value, LazyArtifactDict):
+        return value.return_nbytes()
+    elif isinstance(value, np.ndarray):
+        return value.nbytes
+    elif isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    elif isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=True))
+    elif isinstance(value, dict):
+        return sum(return_nbytes(x) for x in value.values())
+    elif isinstance(value, (tuple, list)):
+        return sum(return_nbytes(x) for x in value)
+    else:
+        return sys.getsizeof(value)
+
+
+def _set_read_only(value):
+    """Recursively make the arrays of a value read-only."""
+    if isinstance(value, np.ndarray):
+        value.setflags(write=False)
+    elif isinstance(value, dict):
+        for x in value.values():
+            _set_read_only(x)
+    elif isinstance(value, (tuple, list)):
+        for x in value:
+            _set_read_only(x)
+
+
+def prepare_for_fork(l_dics):
+    """Load all the variables of the given dictionnaries before forking worker processes (e.g.
+    with gunicorn --preload), so that they are shared by the workers rather than loaded by each of
+    them. The arrays are made read-only, and the objects are moved out of the reach of the garbage
+    collector, so that collections in the workers don't write to (and duplicate) the shared
+    pages."""
+    for dic in l_dics:
+        if isinstance(dic, LazyArtifactDict):
+            dic.load_all()
+        for key in dic:
+            _set_read_only(dic[key])
+    gc.collect()
+    gc.freeze()
+
+
+def load_artifact_metadata(path_artifact):
+    """Return the metadata stored in the index of an artifact (legacy pickle files have none)."""
+    if path_artifact.endswith(".pkl"):
+        return {}
+    with open(os.path.join(path_artifact, NAME_INDEX), "r") as f:
+        return json.load(f).get("metadata", {})
+
+
+def return_full_precision(dic, key):
+    """Return the variable key of a dictionnary of variables with its dataframes in full
+    precision, whether the dictionnary is lazy or not."""
+    if isinstance(dic, LazyArtifactDict):
+        return dic.load_full_precision(key)
+    return dic[key]
+
+
+def load_artifact(path_artifact):
+    """Return the (lazy) dictionnaries of variables before and after beam-beam stored at the
+    given path. Legacy pickle files are also supported, but are loaded entirely."""
+    if path_artifact.endswith(".pkl"):
+        with open(path_artifact, "rb") as f:
+            dic_without_bb, dic_with_bb = pickle.load(f)
+        return dic_without_bb, dic_with_bb
+
+    with open(os.path.join(path_artifact, NAME_INDEX), "r") as f:
+        dic_index = json.load(f)
+    if dic_index["schema_version"] != SCHEMA_VERSION:
+        raise ValueError(
+            f"The artifact {path_artifact} has schema version {dic_index['schema_version']},"
+            f" but version {SCHEMA_VERSION} is expected."
+        )
+
+    dic_without_bb = LazyArtifactDict(path_artifact, dic_index["states"]["without_bb"])
+    dic_with_bb = LazyArtifactDict(path_artifact, dic_index["states"]["with_bb"])
+    return dic_without_bb, dic_with_bb
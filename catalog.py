@@ -0,0 +1,207 @@
+# ==================================================================================================
+# --- Imports
+# ==================================================================================================
+import os
+import re
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+# Import functions to read the artifacts and the summary index
+import artifacts
+import summary
+
+"""This module maintains a catalog of the colliders available in the artifacts directory, with
+their label, study (first directory of the label), timestamp and scan parameters (the columns of
+the summary index, e.g. the knobs). The catalog is refreshed incrementally: only the artifacts
+whose index changed (from their mtime) are read again. It answers the searches of the collider
+dropdown on the server side, so that only the best matches are sent to the browser. A search is a
+list of terms separated by spaces, e.g.:
+    all_optics xtrack_00 on_x1>=200 i_oct_b1=300
+where the plain terms must be prefixes of the label or of one of its directories, and the other
+terms are filters on the scan parameters (with =, !=, <, <=, > or >=).
+"""
+
+# Minimum time (in seconds) between two refreshes of the catalog
+REFRESH_INTERVAL = 2.0
+
+# Maximum number of colliders returned by a search
+N_MATCHES_MAX = 50
+
+# Columns describing the colliders (the others are scan parameters)
+L_COLUMNS_CATALOG = ["path_artifact", "label", "study", "timestamp"]
+
+# Pattern of the filters on the scan parameters
+PATTERN_FILTER = re.compile(r"^([A-Za-z_]\w*)(<=|>=|!=|==|=|<|>)([-+]?[\d.]+(?:[eE][-+]?\d+)?)$")
+
+# Lock protecting the catalog
+_lock = threading.Lock()
+
+# Entries of the catalog, by artifact directory name, with the mtime of their index
+_dic_entries = {}
+
+# State of the last refresh
+_dic_refresh = {"time": 0.0, "mtime_dir": None, "mtime_summary": None}
+
+# Catalog as a dataframe sorted by label
+_df_catalog = pd.DataFrame(columns=L_COLUMNS_CATALOG)
+
+
+# ==================================================================================================
+# --- Functions to build the catalog
+# ==================================================================================================
+def _return_mtime(path):
+    """Return the mtime of a path, or None if it doesn't exist."""
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+
+def _return_entry(path_artifact, name, mtime):
+    """Return the entry of an artifact in the catalog, or None if its index can't be read."""
+    try:
+        label = artifacts.load_artifact_metadata(path_artifact).get("label")
+    except (OSError, ValueError):
+        return None
+    label = label if label is not None else name
+    return {
+        "path_artifact": path_artifact,
+        "label": label,
+        "study": label.split("/")[0],
+        "timestamp": mtime,
+        "mtime": mtime,
+    }
+
+
+def refresh_catalog(force=False):
+    """Refresh the catalog from the artifacts directory. The directory is only listed again if it
+    changed, and only the artifacts whose index changed are read again."""
+    global _df_catalog
+    with _lock:
+        if not force and time.time() - _dic_refresh["time"] < REFRESH_INTERVAL:
+            return
+        _dic_refresh["time"] = time.time()
+
+        mtime_dir = _return_mtime(artifacts.PATH_ARTIFACTS)
+        mtime_summary = _return_mtime(summary.PATH_SUMMARY)
+        if (
+            not force
+            and mtime_dir == _dic_refresh["mtime_dir"]
+            and mtime_summary == _dic_refresh["mtime_summary"]
+        ):
+            return
+
+        # Update the entries of the artifacts added, changed or removed
+        dic_entries = {}
+        if mtime_dir is not None:
+            for entry_dir in os.scandir(artifacts.PATH_ARTIFACTS):
+                # Skip the artifacts being written, the chunk store and the other files, but keep
+                # the legacy pickle files
+                if entry_dir.name.startswith("."):
+                    continue
+                if entry_dir.is_dir():
+                    mtime = _return_mtime(os.path.join(entry_dir.path, artifacts.NAME_INDEX))
+                elif entry_dir.name.endswith(".pkl"):
+                    mtime = _return_mtime(entry_dir.path)
+                else:
+                    continue
+                if mtime is None:
+                    continue
+                entry = _dic_entries.get(entry_dir.name)
+                if entry is None or entry["mtime"] != mtime:
+                    entry = _return_entry(entry_dir.path, entry_dir.name, mtime)
+                if entry is not None:
+                    dic_entries[entry_dir.name] = entry
+        _dic_entries.clear()
+        _dic_entries.update(dic_entries)
+
+        # Add the scan parameters from the summary index
+        df_catalog = pd.DataFrame(list(_dic_entries.values()), columns=L_COLUMNS_CATALOG)
+        df_summary = summary.load_summary().drop(columns="label", errors="ignore")
+        df_catalog = df_catalog.merge(df_summary, on="path_artifact", how="left")
+        _df_catalog = df_catalog.sort_values("label", ignore_index=True)
+        _dic_refresh["mtime_dir"] = mtime_dir
+        _dic_refresh["mtime_summary"] = mtime_summary
+
+
+def return_catalog():
+    """Return the (refreshed) catalog as a dataframe, sorted by label."""
+    refresh_catalog()
+    return _df_catalog
+
+
+def return_l_paths_catalog():
+    """Return the artifact paths of the colliders of the catalog, sorted by label."""
+    return return_catalog()["path_artifact"].tolist()
+
+
+def return_label(path_artifact):
+    """Return the label of a collider of the catalog, or None if it's not in the catalog."""
+    df_catalog = return_catalog()
+    l_labels = df_catalog.loc[df_catalog["path_artifact"] == path_artifact, "label"].tolist()
+    return l_labels[0] if len(l_labels) > 0 else None
+
+
+# ==================================================================================================
+# --- Functions to search the catalog
+# ==================================================================================================
+def return_mask_search(df_catalog, query):
+    """Return the mask of the colliders of the catalog matching a search query."""
+    mask = np.ones(len(df_catalog), dtype=bool)
+    if not query:
+        return mask
+
+    # Remove the spaces around the operators, so that "on_x1 > 200" is a single term
+    query = re.sub(r"\s*(<=|>=|!=|==|=|<|>)\s*", r"\1", query.strip())
+    label_lower = df_catalog["label"].str.lower()
+    for term in query.split():
+        match_filter = PATTERN_FILTER.match(term)
+        if match_filter is None:
+            # Prefix of the label or of one of its directories
+            term = term.lower()
+            mask &= (
+                label_lower.str.startswith(term) | label_lower.str.contains("/" + term, regex=False)
+            ).to_numpy()
+            continue
+
+        parameter, operator, value = match_filter.groups()
+        if parameter not in df_catalog.columns or parameter in L_COLUMNS_CATALOG:
+            return np.zeros(len(df_catalog), dtype=bool)
+        array_parameter = df_catalog[parameter].to_numpy(dtype=float)
+        value = float(value)
+        match operator:
+            case "=" | "==":
+                mask &= np.isclose(array_parameter, value)
+            case "!=":
+                mask &= ~np.isclose(array_parameter, value)
+            case "<":
+                mask &= array_parameter < value
+            case "<=":
+                mask &= array_parameter <= value
+            case ">":
+                mask &= array_parameter > value
+            case ">=":
+                mask &= array_parameter >= value
+    return mask
+
+
+def search_catalog(query, path_artifact_kept=None, n_matches_max=N_MATCHES_MAX):
+    """Return the data of the collider dropdown for a search query: the first n_matches_max
+    matching colliders, grouped by study. The collider path_artifact_kept (e.g. the one selected)
+    is always included, so that the dropdown can display it."""
+    df_catalog = return_catalog()
+    df_matches = df_catalog[return_mask_search(df_catalog, query)].iloc[:n_matches_max]
+    l_paths_matches = df_matches["path_artifact"].tolist()
+    if path_artifact_kept is not None and path_artifact_kept not in l_paths_matches:
+        df_kept = df_catalog[df_catalog["path_artifact"] == path_artifact_kept]
+        df_matches = pd.concat([df_kept, df_matches])
+
+    return [
+        {"value": path_artifact, "label": label, "group": study}
+        for path_artifact, label, study in zip(
+            df_matches["path_artifact"], df_matches["label"], df_matches["study"]
+        )
+    ]
@@ -0,0 +1,59 @@
+# ==================================================================================================
+# --- Imports
+# ==================================================================================================
+import io
+
+import numpy as np
+import pandas as pd
+import requests
+
+"""Small helper to get the variables of the collider currently served by a dashboard, through its
+data API (see api.py), e.g. from a notebook:
+    from client import SimBoardClient
+    client = SimBoardClient("http://localhost:8080")  # or collider=<id> for another collider
+    df_tw_b1 = client.get_frame("df_tw_b1", columns=["s", "betx", "bety"])
+    dic_sep = client.get("dic_sep_IPs/v/ip1", state="without_bb")
+"""
+
+
+class SimBoardClient:
+    """Client of the data API of a dashboard. collider is the id of the collider to get (the name
+    of its artifact directory, as in the /collider/<id> URLs of the dashboard), the default collider
+    of the dashboard being used if None."""
+
+    def __init__(self, url, timeout=60, collider=None):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+        self.collider = collider
+
+    def list_variables(self, state="with_bb"):
+        """Return the names of the variables of the current collider."""
+        response = requests.get(
+            f"{self.url}/api/{state}", params={"collider": self.collider}, timeout=self.timeout
+        )
+        response.raise_for_status()
+        return response.json()
+
+    def get(self, key_path, state="with_bb", columns=None, start=None, stop=None, format="npz"):
+        """Return the columns of a variable as a dictionnary of arrays. format is either "npz" or
+        "arrow" (which requires pyarrow on both sides)."""
+        params = {"format": format, "start": start, "stop": stop, "collider": self.collider}
+        if columns is not None:
+            params["columns"] = ",".join(columns)
+        response = requests.get(
+            f"{self.url}/api/{state}/{key_path}", params=params, timeout=self.timeout
+        )
+        response.raise_for_status()
+
+        if format == "arrow":
+            import pyarrow as pa
+
+            table = pa.ipc.open_stream(response.content).read_all()
+            return {column: table[column].to_numpy() for column in table.column_names}
+
+        with np.load(io.BytesIO(response.content), allow_pickle=False) as npz:
+            return {column: npz[column] for column in npz.files}
+
+    def get_frame(self, key_path, state="with_bb", columns=None, start=None, stop=None):
+        """Return the columns of a dataframe variable (e.g. "df_tw_b1") as a dataframe."""
+        return pd.DataFrame(self.get(key_path, state, columns, start, stop))
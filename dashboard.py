@@ -3,13 +3,25 @@
 # Import standard libraries
 import plotly.graph_objects as go
 import dash_mantine_components as dmc
-from dash import Dash, html, Input, Output, State, no_update, dcc
+from dash import Dash, html, Input, Output, State, Patch, no_update, dcc, ctx
+from flask import request
+import os
 import sys
-import pickle
+import functools
 
-# Import initialization and plotting functions
+# Import initialization, storage and plotting functions
 import init
+import artifacts
+import summary
 import plot
+import figures
+import export
+import api
+import store
+import prefetch
+import catalog
+import paging
+import figure_cache
 
 # Import layout functions
 from layout.configuration import return_configuration_layout
@@ -17,11 +29,19 @@ from layout.filling import return_filling_scheme_layout
 from layout.optics import return_optics_layout
 from layout.sanity import return_sanity_layout
 from layout.survey import return_survey_layout
-from layout.header import return_header_layout, initial_pickle_path
-from layout.tables import return_tables_layout
+from layout.header import return_header_layout
+from layout.tables import (
+    return_tables_layout,
+    return_table_view,
+    return_data_table,
+    return_download_links,
+)
 from layout.separation import return_separation_layout
 from layout.separation_3D import return_3D_separation_layout
 from layout.footprint import return_footprint_layout
+from layout.fma import return_fma_layout
+from layout.da import return_da_layout
+from layout.overview import return_overview_layout
 
 
 #################### Load global variables ####################
@@ -29,16 +49,20 @@ from layout.footprint import return_footprint_layout
 # path_config = "/afs/cern.ch/work/c/cdroin/private/example_DA_study/master_study/scans/all_optics_2024/collider_00/xtrack_0000/config.yaml"  # /afs/cern.ch/work/c/cdroin/private/example_DA_study/master_study/scans/2024_flat/base_collider/xtrack_0000/config.yaml"
 # path_job = path_config.split("/config.yaml")[0]
 # dic_without_bb, dic_with_bb = init.init_from_config(
-#     path_config, force_build_collider=True, load_global_variables_from_pickle=False
+#     path_config, force_build_collider=True, load_global_variables_from_artifact=False
 # )
 
 path_config = None
 path_collider = "/afs/cern.ch/work/c/cdroin/private/example_DA_study/master_study/scans/all_optics_2023/collider_00/xtrack_0000/collider.json"
 path_job = path_collider.split("/final_collider.json")[0]
-dic_without_bb, dic_with_bb, initial_pickle_path = init.init_from_collider(
-    path_collider, load_global_variables_from_pickle=True
+dic_without_bb, dic_with_bb, initial_artifact_path = init.init_from_collider(
+    path_collider, load_global_variables_from_artifact=True
 )
 
+# The collider loaded at launch is displayed by default, the others are loaded on request (through
+# their URL) in a cache shared by all the requests
+store.set_default_collider(initial_artifact_path, dic_without_bb, dic_with_bb, path_job)
+
 # Activating this will allow to select a collider from the dropdown menu, but will restrict the choice to preloaded colliders
 ACTIVATE_COLLIDER_DROPDOWN = True
 #################### App ####################
@@ -52,12 +76,36 @@ app = Dash(
 )
 server = app.server
 
+
+def return_dic_from_request(state):
+    """Return the variables of the collider requested in the query string of a request to the
+    export or data endpoints (?collider=<id>), or of the default collider."""
+    path_artifact = store.return_path_artifact_from_id(request.args.get("collider"))
+    return store.return_collider(path_artifact).return_dic(state)
+
+
+# Endpoints to download the tables and get the data of the colliders
+server.register_blueprint(export.return_export_blueprint(return_dic_from_request))
+server.register_blueprint(api.return_api_blueprint(return_dic_from_request))
+
+
+@server.route("/stats/cache")
+def return_cache_stats():
+    """Return the statistics of the cache of colliders (hits, misses, evictions, size)."""
+    return store.return_cache_stats()
+
+
+@server.route("/stats/figures")
+def return_figure_cache_stats():
+    """Return the statistics of the cache of figures (hits, misses, evictions, size)."""
+    return figure_cache.return_figure_cache_stats()
+
 #################### App Layout ####################
 
 layout = html.Div(
     style={"width": "90%", "margin": "auto"},
     children=[
-        dcc.Location(id="url", refresh=True),
+        dcc.Location(id="url", refresh=False),
         return_header_layout(),
         dmc.Center(
             children=[
@@ -98,42 +146,55 @@ def update_preloaded_collider_value_at_launch_style(_):
 
 
 @app.callback(
+    Output("url", "pathname"),
     Output("select-preloaded-collider", "value"),
-    Input("main-div", "style"),
-    State("select-preloaded-collider", "value"),
+    Input("url", "pathname"),
+    Input("select-preloaded-collider", "value"),
 )
-def update_preloaded_collider_value_at_launch(_, value):
+def select_preloaded_collider(pathname, value):
+    # The collider displayed is carried by the URL, which is changed when another one is selected
     if ACTIVATE_COLLIDER_DROPDOWN:
-        global initial_pickle_path
-        if value != initial_pickle_path:
-            return initial_pickle_path
-    return no_update
+        path_artifact = store.return_path_artifact_from_pathname(pathname)
+        if ctx.triggered_id == "select-preloaded-collider":
+            if value is not None and value != path_artifact:
+                return store.return_url_collider(value), no_update
+        else:
+            # Load the colliders likely to be selected next in the background
+            prefetch.prefetch_colliders(path_artifact, catalog.return_l_paths_catalog())
+            if value != path_artifact:
+                return no_update, path_artifact
+    return no_update, no_update
 
 
 @app.callback(
-    Output("url", "href"),
-    Input("select-preloaded-collider", "value"),
+    Output("select-preloaded-collider", "data"),
+    Input("search-preloaded-collider", "value"),
+    Input("select-preloaded-collider", "searchValue"),
+    Input("url", "pathname"),
+    State("select-preloaded-collider", "value"),
 )
-def select_preloaded_collider(value):
-    if ACTIVATE_COLLIDER_DROPDOWN:
-        global dic_without_bb, dic_with_bb, path_job, initial_pickle_path
-        if value is not None and value != initial_pickle_path:
-            try:
-                with open(value, "rb") as f:
-                    dic_without_bb, dic_with_bb = pickle.load(f)
-                path_job = value.split("collider.jsont_dic_var.pkl")[0]
-                initial_pickle_path = value
-                return "/"
-            except:
-                print("Could not load pickle file.")
-    return no_update
+def update_preloaded_collider_options(filter_value, search_value, pathname, value):
+    # The dropdown only gets the best matches of the search, always including the selected collider
+    if not ACTIVATE_COLLIDER_DROPDOWN:
+        return no_update
+    # Once a collider is selected, the search value of the dropdown is its label
+    if value is not None and search_value == catalog.return_label(value):
+        search_value = None
+    query = " ".join([filter_value or "", search_value or ""])
+    return catalog.search_catalog(query, store.return_path_artifact_from_pathname(pathname))
 
 
-@app.callback(Output("placeholder-tabs", "children"), Input("tab-titles", "value"))
-def select_tab(value):
+@app.callback(
+    Output("placeholder-tabs", "children"),
+    Input("tab-titles", "value"),
+    Input("url", "pathname"),
+)
+def select_tab(value, pathname):
+    collider = store.return_collider_from_pathname(pathname)
+    dic_without_bb, dic_with_bb = collider.dic_without_bb, collider.dic_with_bb
     match value:
         case "display-configuration":
-            return return_configuration_layout(dic_with_bb["configuration_str"], path_job)
+            return return_configuration_layout(dic_with_bb["configuration_str"], collider.path_job)
         case "display-twiss":
             return return_tables_layout()
         case "display-scheme":
@@ -144,6 +205,12 @@ def select_tab(value):
             return return_3D_separation_layout(dic_without_bb["dic_bb_ho_IPs"])
         case "display-footprint":
             return return_footprint_layout()
+        case "display-fma":
+            return return_fma_layout()
+        case "display-da":
+            return return_da_layout()
+        case "display-overview":
+            return return_overview_layout(return_cached_summary(), summary.L_COLUMNS_ID)
         case "display-sanity":
             sanity_after_beam_beam = return_sanity_layout(
                 dic_with_bb["dic_tw_b1"],
@@ -196,46 +263,99 @@ def select_tab(value):
             return return_configuration_layout(path_config)
 
 
-@app.callback(Output("placeholder-data-table", "children"), Input("segmented-data-table", "value"))
-def select_data_table(value):
+def return_cached_summary():
+    """Return the summary index of the colliders, only reloaded when it's modified."""
+    if not os.path.isfile(summary.PATH_SUMMARY):
+        return summary.load_summary()
+    return _return_summary_from_mtime(os.path.getmtime(summary.PATH_SUMMARY))
+
+
+@functools.lru_cache(maxsize=1)
+def _return_summary_from_mtime(mtime):
+    return summary.load_summary()
+
+
+@functools.lru_cache(maxsize=4)
+def return_cached_table_view(path_artifact, key_df):
+    """Return the view displayed in the data table of a given dataframe (in full precision) of a
+    collider, along with its presorted indexes."""
+    dic_with_bb = store.return_collider(path_artifact).dic_with_bb
+    return paging.PagedTable(
+        return_table_view(artifacts.return_full_precision(dic_with_bb, key_df))
+    )
+
+
+def return_key_df_table(value):
+    """Return the key of the dataframe displayed in the data table for a segmented control
+    value."""
     match value:
-        case "Twiss table beam 1":
-            return dic_with_bb["table_tw_b1"]
         case "Survey table beam 1":
-            return dic_with_bb["table_sv_b1"]
+            return "df_sv_b1"
         case "Twiss table beam 2":
-            return dic_with_bb["table_tw_b2"]
+            return "df_tw_b2"
         case "Survey table beam 2":
-            return dic_with_bb["table_sv_b2"]
+            return "df_sv_b2"
         case _:
-            return dic_with_bb["table_tw_b1"]
+            return "df_tw_b1"
+
+
+@app.callback(
+    Output("placeholder-data-table", "children"),
+    Input("segmented-data-table", "value"),
+    Input("url", "pathname"),
+)
+def select_data_table(value, pathname):
+    path_artifact = store.return_path_artifact_from_pathname(pathname)
+    key_df = return_key_df_table(value)
+
+    # Tables are built on demand, from the dataframes of the collider after beam-beam
+    name_table = {key: name for name, key in export.DIC_TABLES.items()}[key_df]
+    return [
+        return_download_links("with_bb", name_table, store.return_collider_id(path_artifact)),
+        return_data_table(
+            return_cached_table_view(path_artifact, key_df).df,
+            "id-data-table-after-bb",
+            server_side=True,
+        ),
+    ]
+
+
+@app.callback(
+    Output("id-data-table-after-bb", "data"),
+    Output("id-data-table-after-bb", "page_count"),
+    Input("id-data-table-after-bb", "page_current"),
+    Input("id-data-table-after-bb", "page_size"),
+    Input("id-data-table-after-bb", "sort_by"),
+    Input("id-data-table-after-bb", "filter_query"),
+    State("segmented-data-table", "value"),
+    State("url", "pathname"),
+)
+def update_data_table_page(page_current, page_size, sort_by, filter_query, value, pathname):
+    # Only the visible page is sent, sorted and filtered on the server
+    path_artifact = store.return_path_artifact_from_pathname(pathname)
+    paged_table = return_cached_table_view(path_artifact, return_key_df_table(value))
+    return paged_table.return_page(page_current, page_size, sort_by, filter_query)
 
 
 @app.callback(
     Output("LHC-layout", "figure"),
     Input("chips-ip", "value"),
+    Input("url", "pathname"),
 )
-def update_graph_LHC_layout(l_values):
-    l_indices_to_keep = []
-    for val in l_values:
-        str_ind_1, str_ind_2 = val.split("-")
-        # Get indices of elements to keep (# ! implemented only for beam 1)
-        l_indices_to_keep.extend(
-            plot.get_indices_of_interest(
-                dic_with_bb["df_tw_b1"], "ip" + str_ind_1, "ip" + str_ind_2
-            )
-        )
+def update_graph_LHC_layout(l_values, pathname):
+    collider = store.return_collider_from_pathname(pathname)
+    return return_memoized_figure_LHC_layout(collider, l_values)
 
-    fig = plot.return_plot_lattice_with_tracking(
-        dic_with_bb["df_sv_b1"],
-        dic_with_bb["df_elements_corrected"],
-        dic_with_bb["df_tw_b1"],
-        df_sv_2=dic_with_bb["df_sv_b2"],
-        df_tw_2=dic_with_bb["df_tw_b2"],
-        l_indices_to_keep=l_indices_to_keep,
-    )
 
-    return fig
+@figure_cache.memoize_figure("LHC_layout")
+def return_memoized_figure_LHC_layout(collider, l_values):
+    # Serve the pre-rendered figure for the default inputs if it exists
+    if l_values == figures.DEFAULT_L_IPS_LAYOUT:
+        fig = figures.load_prerendered_figure(collider.path_artifact, "LHC_layout")
+        if fig is not None:
+            return fig
+
+    return figures.return_figure_LHC_layout(collider.dic_with_bb, l_values)
 
 
 @app.callback(
@@ -243,8 +363,11 @@ def update_graph_LHC_layout(l_values):
     Output("filling-scheme-graph", "style"),
     Output("filling-scheme-alert", "style"),
     Input("tab-titles", "value"),
+    Input("url", "pathname"),
 )
-def update_graph_filling(value):
+def update_graph_filling(value, pathname):
+    collider = store.return_collider_from_pathname(pathname)
+    dic_with_bb = collider.dic_with_bb
     if value == "display-scheme":
         if dic_with_bb["array_b1"] is not None:
             return (
@@ -270,76 +393,139 @@ def update_graph_filling(value):
         return no_update
 
 
+def return_patch_figure(l_changes):
+    """Return a Patch applying the changes of a figure returned by figures.return_l_changes."""
+    patch = Patch()
+    for path, value in l_changes:
+        patch_item = patch
+        for key in path[:-1]:
+            patch_item = patch_item[key]
+        patch_item[path[-1]] = value
+    return patch
+
+
+def return_figure_or_patch(return_figure, collider, l_inputs, l_inputs_displayed):
+    """Return the figure return_figure(collider, *l_inputs), or only its differences with the
+    figure displayed (built from l_inputs_displayed, as stored by this function) as a Patch if
+    they have the same structure, along with the inputs to store."""
+    collider_id = store.return_collider_id(collider.path_artifact)
+    l_inputs_stored = [collider_id] + list(l_inputs)
+    if l_inputs_displayed == l_inputs_stored:
+        return no_update, no_update
+
+    fig = return_figure(collider, *l_inputs)
+    if l_inputs_displayed is not None and l_inputs_displayed[0] == collider_id:
+        l_changes = figures.return_l_changes(
+            return_figure(collider, *l_inputs_displayed[1:]), fig
+        )
+        if l_changes is not None:
+            return return_patch_figure(l_changes), l_inputs_stored
+    return fig, l_inputs_stored
+
+
 @app.callback(
     Output("LHC-2D-near-IP", "figure"),
+    Output("store-optics-figure", "data"),
     Input("tab-titles", "value"),
     Input("vertical-zoom-optics", "value"),
+    Input("url", "pathname"),
+    State("store-optics-figure", "data"),
 )
-def update_graph_optics(tab_value, zoom_value):
+def update_graph_optics(tab_value, zoom_value, pathname, l_inputs_displayed):
     if tab_value == "display-optics":
-        fig = plot.return_plot_optics(
-            dic_with_bb["df_tw_b1"],
-            dic_with_bb["df_tw_b2"],
-            dic_with_bb["df_sv_b1"],
-            dic_with_bb["df_elements_corrected"],
-        )
+        collider = store.return_collider_from_pathname(pathname)
+        collider_id = store.return_collider_id(collider.path_artifact)
+
+        # Only the ranges of the axes change with the zoom
+        if l_inputs_displayed is not None and l_inputs_displayed[0] == collider_id:
+            if l_inputs_displayed[1] == zoom_value:
+                return no_update, no_update
+            patch = Patch()
+            for axis, range_axis in figures.return_dic_ranges_optics(zoom_value).items():
+                patch["layout"][axis]["range"] = range_axis
+            return patch, [collider_id, zoom_value]
+
+        return return_memoized_figure_optics(collider, zoom_value), [collider_id, zoom_value]
+    else:
+        return no_update, no_update
 
-        factor = 2**-zoom_value
-        fig.update_yaxes(
-            title_text=r"$\beta_{x,y}[m]$", range=[0, 10000 * factor * 2], row=2, col=1
-        )
-        fig.update_yaxes(
-            title_text=r"(Closed orbit)$_{x,y}[m]$",
-            range=[-0.03 * factor, 0.03 * factor],
-            row=3,
-            col=1,
-        )
-        fig.update_yaxes(title_text=r"$D_{x,y}[m]$", range=[-3 * factor, 3 * factor], row=4, col=1)
 
-        return fig
-    else:
-        return no_update
+@figure_cache.memoize_figure("optics")
+def return_memoized_figure_optics(collider, zoom_value):
+    # Serve the pre-rendered figure for the default inputs if it exists
+    if zoom_value == figures.DEFAULT_ZOOM_OPTICS:
+        fig = figures.load_prerendered_figure(collider.path_artifact, "optics")
+        if fig is not None:
+            return fig
+
+    return figures.return_figure_optics(collider.dic_with_bb, zoom_value)
 
 
 @app.callback(
     Output("beam-separation", "figure"),
+    Output("store-separation-figure", "data"),
     Input("chips-sep", "value"),
     Input("chips-sep-bb", "value"),
+    Input("url", "pathname"),
+    State("store-separation-figure", "data"),
 )
-def update_graph_separation(value, bb):
+def update_graph_separation(value, bb, pathname, l_inputs_displayed):
+    # Switching the beam-beam (or the plane) only swaps the data of the traces
+    collider = store.return_collider_from_pathname(pathname)
+    return return_figure_or_patch(
+        return_memoized_figure_separation, collider, [value, bb], l_inputs_displayed
+    )
+
+
+@figure_cache.memoize_figure("separation")
+def return_memoized_figure_separation(collider, value, bb):
     if bb == "On":
-        dic = dic_with_bb
+        dic = collider.dic_with_bb
     elif bb == "Off":
-        dic = dic_without_bb
+        dic = collider.dic_without_bb
     else:
         raise ValueError("bb should be either On or Off")
 
-    if value == "v" or value == "h":
-        fig = plot.return_plot_separation(dic["dic_sep_IPs"][value])
-    elif value == "||v+h||":
-        fig = plot.return_plot_separation_both_planes(
-            dic["dic_sep_IPs"]["v"], dic["dic_sep_IPs"]["h"]
-        )
-    else:
-        raise ValueError("value should be either v, h or ||v+h||")
-    return fig
+    # Serve the pre-rendered figure if it exists
+    fig = figures.load_prerendered_figure(
+        collider.path_artifact, figures.return_name_separation(bb, value)
+    )
+    if fig is not None:
+        return fig
+
+    return figures.return_figure_separation(dic, value)
 
 
 @app.callback(
     Output("beam-separation-3D", "figure"),
+    Output("store-separation-3D-figure", "data"),
     Input("chips-sep-bb-3D", "value"),
+    Input("url", "pathname"),
+    State("store-separation-3D-figure", "data"),
 )
-def update_graph_separation_3D(bb):
+def update_graph_separation_3D(bb, pathname, l_inputs_displayed):
+    # Switching the beam-beam only swaps the data of the traces
+    collider = store.return_collider_from_pathname(pathname)
+    return return_figure_or_patch(
+        return_memoized_figure_separation_3D, collider, [bb], l_inputs_displayed
+    )
+
+
+@figure_cache.memoize_figure("separation_3D")
+def return_memoized_figure_separation_3D(collider, bb):
     if bb == "On":
-        dic = dic_with_bb
+        dic = collider.dic_with_bb
     elif bb == "Off":
-        dic = dic_without_bb
+        dic = collider.dic_without_bb
     else:
         raise ValueError("bb should be either On or Off")
 
-    fig = plot.return_plot_separation_3D(dic["dic_bb_ho_IPs"])
+    # Serve the pre-rendered figure if it exists
+    fig = figures.load_prerendered_figure(collider.path_artifact, f"separation_3D_{bb}")
+    if fig is not None:
+        return fig
 
-    return fig
+    return figures.return_figure_separation_3D(dic)
 
 
 @app.callback(
@@ -348,60 +534,178 @@ def update_graph_separation_3D(bb):
     Output("footprint-with-bb-b1", "figure"),
     Output("footprint-with-bb-b2", "figure"),
     Input("tab-titles", "value"),
+    Input("chips-footprint-render-mode", "value"),
+    Input("url", "pathname"),
 )
-def update_graph_footprint(value):
+def update_graph_footprint(value, render_mode, pathname):
+    collider = store.return_collider_from_pathname(pathname)
+    dic_without_bb, dic_with_bb = collider.dic_without_bb, collider.dic_with_bb
     if value == "display-footprint":
-        if dic_without_bb["i_bunch_b1"] is not None:
-            title_without_bb_b1 = (
-                "Tune footprint without beam-beam effects for beam 1 and bunch "
-                + str(dic_without_bb["i_bunch_b1"])
-            )
-            title_without_bb_b2 = (
-                "Tune footprint without beam-beam effects for beam 2 and bunch "
-                + str(dic_without_bb["i_bunch_b2"])
-            )
-            title_with_bb_b1 = "Tune footprint with beam-beam effects for beam 1 and bunch " + str(
-                dic_with_bb["i_bunch_b1"]
-            )
-            title_with_bb_b2 = "Tune footprint with beam-beam effects for beam 2 and bunch " + str(
-                dic_with_bb["i_bunch_b2"]
+        match render_mode:
+            case "Scatter":
+                render_mode = "scatter"
+            case "Density":
+                render_mode = "heatmap"
+            case _:
+                render_mode = "auto"
+
+        # Serve the pre-rendered figures for the default inputs if they exist
+        if render_mode == figures.DEFAULT_RENDER_MODE_FOOTPRINT:
+            l_figures = [
+                figures.load_prerendered_figure(collider.path_artifact, name)
+                for name in figures.return_l_names_footprint()
+            ]
+            if all(fig is not None for fig in l_figures):
+                return l_figures
+
+        return figures.return_figures_footprint(dic_without_bb, dic_with_bb, render_mode)
+    else:
+        return no_update
+
+
+@app.callback(
+    Output("footprint-decomposition-b1", "figure"),
+    Output("footprint-decomposition-b2", "figure"),
+    Output("footprint-decomposition-group", "style"),
+    Output("footprint-decomposition-alert", "style"),
+    Input("tab-titles", "value"),
+    Input("url", "pathname"),
+)
+def update_graph_footprint_decomposition(value, pathname):
+    collider = store.return_collider_from_pathname(pathname)
+    dic_with_bb = collider.dic_with_bb
+    if value == "display-footprint":
+        # Colliders preloaded before the decomposition was implemented don't have it
+        if dic_with_bb.get("footprint_decomposition_b1") is not None:
+            return (
+                plot.return_plot_footprint_decomposition(
+                    dic_with_bb["footprint_decomposition_b1"],
+                    title="Beam-beam contributions to the tune footprint of beam 1",
+                ),
+                plot.return_plot_footprint_decomposition(
+                    dic_with_bb["footprint_decomposition_b2"],
+                    title="Beam-beam contributions to the tune footprint of beam 2",
+                ),
+                {"width": "100%"},
+                {"margin": "auto", "display": "none"},
             )
         else:
-            title_without_bb_b1 = (
-                "Tune footprint without beam-beam effects for beam 1 (bunch number unknown)"
-            )
-            title_without_bb_b2 = (
-                "Tune footprint without beam-beam effects for beam 2 (bunch number unknown)"
-            )
-            title_with_bb_b1 = (
-                "Tune footprint with beam-beam effects for beam 1 (bunch number unknown)"
+            return (
+                go.Figure(),
+                go.Figure(),
+                {"display": "none"},
+                {"margin": "auto"},
             )
-            title_with_bb_b2 = (
-                "Tune footprint with beam-beam effects for beam 2 (bunch number unknown)"
+    else:
+        return no_update
+
+
+@app.callback(
+    Output("footprint-multibunch", "figure"),
+    Output("footprint-multibunch", "style"),
+    Input("tab-titles", "value"),
+    Input("url", "pathname"),
+)
+def update_graph_footprint_multibunch(value, pathname):
+    collider = store.return_collider_from_pathname(pathname)
+    dic_with_bb = collider.dic_with_bb
+    if value == "display-footprint":
+        # The multi-bunch footprints are only computed on request
+        if dic_with_bb.get("footprint_multibunch_b1") is not None:
+            return (
+                plot.return_plot_footprint_multibunch(
+                    dic_with_bb["footprint_multibunch_b1"],
+                    dic_with_bb["footprint_multibunch_b2"],
+                ),
+                {"height": "60vh", "width": "100%", "margin": "auto"},
             )
+        else:
+            return go.Figure(), {"display": "none"}
+    else:
+        return no_update
 
-        return [
-            plot.return_plot_footprint(
-                dic_without_bb["footprint_b1"],
-                title=title_without_bb_b1,
-            ),
-            plot.return_plot_footprint(
-                dic_without_bb["footprint_b2"],
-                title=title_without_bb_b2,
-            ),
-            plot.return_plot_footprint(
-                dic_with_bb["footprint_b1"],
-                title=title_with_bb_b1,
+
+@app.callback(
+    Output("fma-b1", "figure"),
+    Output("fma-b2", "figure"),
+    Output("fma-b1", "style"),
+    Output("fma-b2", "style"),
+    Output("fma-alert", "style"),
+    Input("chips-fma-bb", "value"),
+    Input("url", "pathname"),
+)
+def update_graph_fma(bb, pathname):
+    collider = store.return_collider_from_pathname(pathname)
+    dic_without_bb, dic_with_bb = collider.dic_without_bb, collider.dic_with_bb
+    if bb == "On":
+        dic = dic_with_bb
+    elif bb == "Off":
+        dic = dic_without_bb
+    else:
+        raise ValueError("bb should be either On or Off")
+
+    # The frequency map analysis is only computed on request
+    if dic.get("fma_b1") is not None:
+        style = {"height": "45vh", "width": "100%", "margin": "auto"}
+        return (
+            plot.return_plot_fma(
+                dic["fma_b1"], title=f"Frequency map analysis for beam 1 (beam-beam {bb})"
             ),
-            plot.return_plot_footprint(
-                dic_with_bb["footprint_b2"],
-                title=title_with_bb_b2,
+            plot.return_plot_fma(
+                dic["fma_b2"], title=f"Frequency map analysis for beam 2 (beam-beam {bb})"
             ),
-        ]
+            style,
+            style,
+            {"margin": "auto", "display": "none"},
+        )
+    else:
+        return (
+            go.Figure(),
+            go.Figure(),
+            {"display": "none"},
+            {"display": "none"},
+            {"margin": "auto"},
+        )
+
+
+@app.callback(
+    Output("da-graph", "figure"),
+    Output("da-graph", "style"),
+    Output("da-alert", "style"),
+    Input("tab-titles", "value"),
+    Input("url", "pathname"),
+)
+def update_graph_da(value, pathname):
+    collider = store.return_collider_from_pathname(pathname)
+    dic_with_bb = collider.dic_with_bb
+    if value == "display-da":
+        # The dynamic aperture estimate is only computed on request
+        if dic_with_bb.get("da_b1") is not None:
+            return (
+                plot.return_plot_da(dic_with_bb["da_b1"], dic_with_bb["da_b2"]),
+                {"height": "80vh", "width": "100%", "margin": "auto"},
+                {"margin": "auto", "display": "none"},
+            )
+        else:
+            return (
+                go.Figure(),
+                {"height": "80vh", "width": "100%", "margin": "auto", "display": "none"},
+                {"margin": "auto"},
+            )
     else:
         return no_update
 
 
+@app.callback(
+    Output("overview-heatmap", "figure"),
+    Input("select-overview-x", "value"),
+    Input("select-overview-y", "value"),
+    Input("select-overview-z", "value"),
+)
+def update_graph_overview(column_x, column_y, column_z):
+    return plot.return_plot_summary_heatmap(return_cached_summary(), column_x, column_y, column_z)
+
+
 # ! Uncomment this function once I find out how to store collider elements
 # @app.callback(
 #     Output("text-element", "children"),
@@ -513,11 +817,19 @@ def update_graph_footprint(value):
 #     )
 
 
+#################### Preload for forked workers ####################
+def prepare_for_fork():
+    """Load the variables of the current collider before the workers are forked, so that they
+    share them (called by gunicorn.conf.py)."""
+    collider = store.return_collider(store.path_artifact_default)
+    artifacts.prepare_for_fork([collider.dic_without_bb, collider.dic_with_bb])
+
+
 #################### Launch app ####################
 if __name__ == "__main__":
     app.run_server(debug=False, host="0.0.0.0", port=8080)
 
 
-# Run with gunicorn dashboard:server -b :8000
-# Run silently with nohup gunicorn dashboard:server -b :8080 &
+# Run with gunicorn -c gunicorn.conf.py dashboard:server (data loaded once, shared by the workers)
+# Run silently with nohup gunicorn -c gunicorn.conf.py dashboard:server &
 # Kill with pkill gunicorn
@@ -0,0 +1,231 @@
+# ==================================================================================================
+# --- Imports
+# ==================================================================================================
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from flask import Blueprint, Response, abort, request, stream_with_context
+
+# Import functions to load the full-precision dataframes
+import artifacts
+
+"""This module defines the endpoints used to download the twiss and survey tables of the current
+collider, as CSV, Parquet or MAD-X TFS files. The tables are streamed by chunks of rows from the
+stored (memory-mapped) dataframes, so that the output is never built entirely in memory. For
+instance:
+    /export/with_bb/twiss_b1?format=tfs&columns=name,s,betx,bety&s_min=0&s_max=1000
+"""
+
+# Dataframes that can be exported
+DIC_TABLES = {
+    "twiss_b1": "df_tw_b1",
+    "twiss_b2": "df_tw_b2",
+    "survey_b1": "df_sv_b1",
+    "survey_b2": "df_sv_b2",
+}
+
+# Beam-beam states that can be exported
+L_STATES = ["with_bb", "without_bb"]
+
+# Number of rows streamed at once
+N_ROWS_CHUNK = 5000
+
+# Mimetype of each format
+DIC_MIMETYPES = {
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+    "tfs": "text/plain",
+}
+
+
+# ==================================================================================================
+# --- Functions to stream the tables
+# ==================================================================================================
+def return_chunks(df, l_columns, s_min, s_max, n_rows_chunk=N_ROWS_CHUNK):
+    """Yield the requested columns of a dataframe by chunks of rows, only keeping the rows with
+    s_min <= s <= s_max."""
+    for idx in range(0, len(df), n_rows_chunk):
+        df_chunk = df.iloc[idx : idx + n_rows_chunk]
+        if "s" in df_chunk.columns:
+            mask = np.ones(len(df_chunk), dtype=bool)
+            if s_min is not None:
+                mask &= df_chunk["s"].to_numpy() >= s_min
+            if s_max is not None:
+                mask &= df_chunk["s"].to_numpy() <= s_max
+            df_chunk = df_chunk[mask]
+        if len(df_chunk) > 0:
+            yield df_chunk[l_columns]
+
+
+def stream_csv(df, l_columns, s_min, s_max):
+    """Yield the table as CSV."""
+    yield ",".join(l_columns) + "\n"
+    for df_chunk in return_chunks(df, l_columns, s_min, s_max):
+        yield df_chunk.to_csv(header=False, index=False)
+
+
+def _return_tfs_type(series):
+    """Return the TFS format of a column."""
+    if pd.api.types.is_bool_dtype(series) or pd.api.types.is_integer_dtype(series):
+        return "%d"
+    if pd.api.types.is_numeric_dtype(series):
+        return "%le"
+    return "%s"
+
+
+def _return_tfs_column(series, tfs_type):
+    """Return the values of a column formatted for a TFS file."""
+    match tfs_type:
+        case "%d":
+            return series.astype(np.int64).map("{:>24d}".format)
+        case "%le":
+            return series.astype(np.float64).map("{:>24.16e}".format)
+        case _:
+            return series.astype(str).map(lambda x: "{:>24}".format(f'"{x}"'))
+
+
+def stream_tfs(df, l_columns, s_min, s_max, name_table):
+    """Yield the table in the MAD-X TFS format."""
+    l_types = [_return_tfs_type(df[column]) for column in l_columns]
+    type_table = "TWISS" if name_table.startswith("twiss") else "SURVEY"
+    yield f'@ NAME             %s "{name_table.upper()}"\n'
+    yield f'@ TYPE             %s "{type_table}"\n'
+    yield '@ ORIGIN           %s "SimBoard"\n'
+    yield "* " + " ".join(f"{column:>24}" for column in l_columns) + "\n"
+    yield "$ " + " ".join(f"{tfs_type:>24}" for tfs_type in l_types) + "\n"
+    for df_chunk in return_chunks(df, l_columns, s_min, s_max):
+        df_str = pd.DataFrame(
+            {
+                column: _return_tfs_column(df_chunk[column], tfs_type)
+                for column, tfs_type in zip(l_columns, l_types)
+            }
+        )
+        yield "\n".join("  " + " ".join(row) for row in df_str.itertuples(index=False)) + "\n"
+
+
+class _ParquetStreamSink:
+    """Minimal file-like object collecting the bytes written by a parquet writer, so that they can
+    be yielded (and dropped) after each row group."""
+
+    def __init__(self):
+        self.l_buffers = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        self.l_buffers.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def pop(self):
+        data = b"".join(self.l_buffers)
+        self.l_buffers = []
+        return data
+
+
+def _return_arrow_table(df_chunk, schema):
+    """Return a chunk as an Arrow table of a given schema, with the categorical columns as plain
+    strings."""
+    return pa.Table.from_pandas(
+        df_chunk.astype(
+            {
+                column: str
+                for column in df_chunk.columns
+                if isinstance(df_chunk[column].dtype, pd.CategoricalDtype)
+            }
+        ),
+        schema=schema,
+        preserve_index=False,
+    )
+
+
+def return_arrow_schema(df, l_columns):
+    """Return the Arrow schema of the requested columns of a dataframe, from its dtypes. The
+    categorical columns are exported as strings, and the type of the object columns is inferred
+    from their first value."""
+    schema = pa.Schema.from_pandas(df.iloc[:0][l_columns], preserve_index=False)
+    for idx, column in enumerate(l_columns):
+        if isinstance(df[column].dtype, pd.CategoricalDtype):
+            schema = schema.set(idx, pa.field(column, pa.string()))
+        elif schema.field(idx).type == pa.null() and len(df) > 0:
+            schema = schema.set(idx, pa.field(column, pa.array(df[column].iloc[:1]).type))
+    return schema
+
+
+def stream_parquet(df, l_columns, s_min, s_max):
+    """Yield the table as a Parquet file, one row group per chunk. The schema is set from the
+    dataframe beforehand, so that a valid (empty) file is returned if no row matches the filter."""
+    schema = return_arrow_schema(df, l_columns)
+    sink = _ParquetStreamSink()
+    writer = pq.ParquetWriter(sink, schema)
+    try:
+        for df_chunk in return_chunks(df, l_columns, s_min, s_max):
+            writer.write_table(_return_arrow_table(df_chunk, schema))
+            yield sink.pop()
+    finally:
+        writer.close()
+    yield sink.pop()
+
+
+# ==================================================================================================
+# --- Blueprint
+# ==================================================================================================
+def return_export_blueprint(return_dic):
+    """Return the blueprint of the export endpoints. return_dic is a function returning the
+    dictionnary of variables of the current collider for a given beam-beam state ("with_bb" or
+    "without_bb"), so that the export always follows the collider selected in the dashboard."""
+    blueprint = Blueprint("export", __name__)
+
+    @blueprint.route("/export/<state>/<name_table>")
+    def export_table(state, name_table):
+        if state not in L_STATES or name_table not in DIC_TABLES:
+            abort(404)
+
+        # Get the requested format
+        format_export = request.args.get("format", "csv").lower()
+        if format_export not in DIC_MIMETYPES:
+            abort(400, f"Unknown format {format_export}, must be one of {list(DIC_MIMETYPES)}.")
+
+        # Get the full-precision dataframe (memory-mapped, so not loaded in memory)
+        df = artifacts.return_full_precision(return_dic(state), DIC_TABLES[name_table])
+
+        # Get the requested columns (the internal ones can't be exported) and s-range
+        l_columns_available = [
+            column for column in df.columns if column not in artifacts.L_COLUMNS_INTERNAL
+        ]
+        if request.args.get("columns"):
+            l_columns = request.args["columns"].split(",")
+            l_unknown = [column for column in l_columns if column not in l_columns_available]
+            if len(l_unknown) > 0:
+                abort(400, f"Unknown columns: {l_unknown}.")
+        else:
+            l_columns = l_columns_available
+        s_min = request.args.get("s_min", type=float)
+        s_max = request.args.get("s_max", type=float)
+
+        match format_export:
+            case "csv":
+                generator = stream_csv(df, l_columns, s_min, s_max)
+            case "parquet":
+                generator = stream_parquet(df, l_columns, s_min, s_max)
+            case "tfs":
+                generator = stream_tfs(df, l_columns, s_min, s_max, name_table)
+
+        filename = f"{name_table}_{state}.{format_export}"
+        return Response(
+            stream_with_context(generator),
+            mimetype=DIC_MIMETYPES[format_export],
+            headers={"Content-Disposition": f"attachment; filename={filename}"},
+        )
+
+    return blueprint
@@ -0,0 +1,190 @@
+# ==================================================================================================
+# --- Imports
+# ==================================================================================================
+import functools
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+import plotly
+
+# Import the versions of the artifacts and of the figures, which are part of the keys
+import artifacts
+import figures
+
+"""This module memoizes the figures built by the callbacks of the dashboard, keyed by the
+collider, the callback and its inputs, so that coming back to the same inputs (e.g. toggling the
+beam-beam chips) doesn't rebuild the figure. The figures are stored as serialized JSON in a LRU
+cache shared by the threads of a worker, with a memory budget in bytes (set by the environment
+variable SIMBOARD_FIGURE_CACHE_BYTES). If SIMBOARD_FIGURE_CACHE_DIR is set, the figures are also
+stored (compressed) in this directory, so that all the workers benefit from them. The keys include
+the collider id (a content hash of the collider files, or the name, size and mtime of a legacy
+pickle file), the schema version of the artifacts and the
+version of the figures (figures.VERSION_FIGURES), which must be bumped when the plotting code
+changes: otherwise, the figures stored on disk would be served stale. The directory can be emptied
+at any time.
+"""
+
+# Memory budget of the cache, in bytes
+SIZE_FIGURE_CACHE_MAX = int(os.environ.get("SIMBOARD_FIGURE_CACHE_BYTES", 256 * 1024**2))
+
+# Directory of the figures stored on disk (None to disable it)
+PATH_FIGURE_CACHE = os.environ.get("SIMBOARD_FIGURE_CACHE_DIR")
+
+# Lock protecting the cache
+_lock = threading.Lock()
+
+# Serialized figures, by key, from the least to the most recently used
+_dic_figures = OrderedDict()
+
+# Statistics of the cache
+_dic_stats = {"hits": 0, "hits_disk": 0, "misses": 0, "evictions": 0, "nbytes": 0}
+
+
+# ==================================================================================================
+# --- Functions to handle the cache
+# ==================================================================================================
+def return_key(collider_id, name_callback, t_inputs):
+    """Return the key of a figure from the id of its collider, the name of the callback and its
+    inputs (which must be JSON-serializable), along with the versions of the artifacts and of the
+    figures."""
+    str_key = json.dumps(
+        [
+            artifacts.SCHEMA_VERSION,
+            figures.VERSION_FIGURES,
+            collider_id,
+            name_callback,
+            t_inputs,
+        ],
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(str_key.encode()).hexdigest()[:32]
+
+
+def return_collider_id(path_artifact):
+    """Return the id of a collider in the keys of the figures. The artifact directories are named
+    from a content hash, while the legacy pickle files are also identified by their size and mtime,
+    so that a pickle regenerated in place doesn't serve stale figures."""
+    collider_id = os.path.basename(os.path.normpath(path_artifact))
+    if path_artifact.endswith(".pkl"):
+        try:
+            stat = os.stat(path_artifact)
+            collider_id += f"_{stat.st_size}_{stat.st_mtime_ns}"
+        except OSError:
+            pass
+    return collider_id
+
+
+def _return_path_figure(key):
+    """Return the path of a figure stored on disk."""
+    return os.path.join(PATH_FIGURE_CACHE, key[:2], key + ".json.gz")
+
+
+def _load_from_disk(key):
+    """Return a serialized figure stored on disk, or None if it doesn't exist."""
+    if PATH_FIGURE_CACHE is None:
+        return None
+    try:
+        with gzip.open(_return_path_figure(key), "rb") as f:
+            return f.read()
+    except (OSError, EOFError):
+        return None
+
+
+def _dump_to_disk(key, data):
+    """Store a serialized figure on disk (written in a temporary file first, then renamed)."""
+    if PATH_FIGURE_CACHE is None:
+        return
+    path_figure = _return_path_figure(key)
+    os.makedirs(os.path.dirname(path_figure), exist_ok=True)
+    fd, path_temp = tempfile.mkstemp(dir=os.path.dirname(path_figure), prefix=".tmp_")
+    with os.fdopen(fd, "wb") as f_raw, gzip.open(f_raw, "wb", compresslevel=3) as f:
+        f.write(data)
+    os.replace(path_temp, path_figure)
+
+
+def _add_to_memory(key, data):
+    """Add a serialized figure to the cache, evicting the least recently used figures if the
+    memory budget is exceeded. Must be called with the lock acquired."""
+    if key in _dic_figures:
+        return
+    _dic_figures[key] = data
+    _dic_stats["nbytes"] += len(data)
+    while _dic_stats["nbytes"] > SIZE_FIGURE_CACHE_MAX and len(_dic_figures) > 1:
+        _, data_evicted = _dic_figures.popitem(last=False)
+        _dic_stats["nbytes"] -= len(data_evicted)
+        _dic_stats["evictions"] += 1
+
+
+def return_figure(collider_id, name_callback, t_inputs, build_figure):
+    """Return the figure (as a dictionnary) built by build_figure() for the given collider,
+    callback and inputs, from the cache if possible."""
+    key = return_key(collider_id, name_callback, t_inputs)
+
+    # From memory
+    with _lock:
+        data = _dic_figures.get(key)
+        if data is not None:
+            _dic_figures.move_to_end(key)
+            _dic_stats["hits"] += 1
+            return json.loads(data)
+
+    # From disk
+    data = _load_from_disk(key)
+    if data is not None:
+        with _lock:
+            _dic_stats["hits_disk"] += 1
+            _add_to_memory(key, data)
+        return json.loads(data)
+
+    # Build the figure (outside of the lock, so that the other requests are not blocked)
+    fig = build_figure()
+    if hasattr(fig, "to_plotly_json"):
+        fig = fig.to_plotly_json()
+    data = json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder).encode()
+    with _lock:
+        _dic_stats["misses"] += 1
+        _add_to_memory(key, data)
+    _dump_to_disk(key, data)
+    return fig
+
+
+def memoize_figure(name_callback):
+    """Decorator memoizing a function returning a figure from a collider (see store.py) and some
+    inputs: func(collider, *inputs)."""
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(collider, *inputs):
+            collider_id = return_collider_id(collider.path_artifact)
+            return return_figure(
+                collider_id, name_callback, inputs, lambda: func(collider, *inputs)
+            )
+
+        return wrapper
+
+    return decorator
+
+
+def clear_figure_cache():
+    """Remove all the figures from memory (the figures stored on disk are kept)."""
+    with _lock:
+        _dic_figures.clear()
+        _dic_stats["nbytes"] = 0
+
+
+def return_figure_cache_stats():
+    """Return the statistics of the cache: hits (from memory and from disk), misses, evictions,
+    number of figures, size and memory budget (in bytes)."""
+    with _lock:
+        return {
+            **_dic_stats,
+            "n_figures": len(_dic_figures),
+            "nbytes_max": SIZE_FIGURE_CACHE_MAX,
+            "disk": PATH_FIGURE_CACHE,
+        }
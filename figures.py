@@ -0,0 +1,222 @@
+# ==================================================================================================
+# --- Imports
+# ==================================================================================================
+import gzip
+import json
+import os
+import tempfile
+
+import plotly
+
+# Import plotting functions
+import plot
+
+"""This module builds the figures of the dashboard from the variables of a collider, and handles
+the bundle of figures pre-rendered (for the default inputs of the dashboard) when building the
+artifacts. Each pre-rendered figure is stored as a compressed JSON file in the artifact directory,
+so that the first display of a tab only costs a file read.
+"""
+
+# Default inputs of the dashboard (must match the default values in the layouts)
+DEFAULT_ZOOM_OPTICS = 0
+DEFAULT_L_IPS_LAYOUT = ["4-6"]
+DEFAULT_RENDER_MODE_FOOTPRINT = "auto"
+
+# Version of the figures, to be bumped when the plotting functions change the figures (part of the
+# keys of the memoized figures, see figure_cache.py)
+VERSION_FIGURES = 1
+
+# Name of the directory of the pre-rendered figures, in the artifact directory
+NAME_FIGURES = "figures"
+
+
+# ==================================================================================================
+# --- Functions to build the figures
+# ==================================================================================================
+def return_figure_optics(dic_with_bb, zoom_value):
+    """Return the optics figure, with the vertical axes zoomed by a factor 2**zoom_value."""
+    fig = plot.return_plot_optics(
+        dic_with_bb["df_tw_b1"],
+        dic_with_bb["df_tw_b2"],
+        dic_with_bb["df_sv_b1"],
+        dic_with_bb["df_elements_corrected"],
+    )
+
+    dic_ranges = return_dic_ranges_optics(zoom_value)
+    fig.update_yaxes(title_text=r"$\beta_{x,y}[m]$", range=dic_ranges["yaxis2"], row=2, col=1)
+    fig.update_yaxes(
+        title_text=r"(Closed orbit)$_{x,y}[m]$", range=dic_ranges["yaxis3"], row=3, col=1
+    )
+    fig.update_yaxes(title_text=r"$D_{x,y}[m]$", range=dic_ranges["yaxis4"], row=4, col=1)
+
+    return fig
+
+
+def return_dic_ranges_optics(zoom_value):
+    """Return the ranges of the vertical axes of the optics figure (beta functions, closed orbit
+    and dispersion), zoomed by a factor 2**zoom_value, by name of axis in the layout."""
+    factor = 2**-zoom_value
+    return {
+        "yaxis2": [0, 10000 * factor * 2],
+        "yaxis3": [-0.03 * factor, 0.03 * factor],
+        "yaxis4": [-3 * factor, 3 * factor],
+    }
+
+
+def return_figure_LHC_layout(dic_with_bb, l_values):
+    """Return the figure of the LHC layout, only showing the arcs between the given IPs."""
+    l_indices_to_keep = []
+    for val in l_values:
+        str_ind_1, str_ind_2 = val.split("-")
+        # Get indices of elements to keep (# ! implemented only for beam 1)
+        l_indices_to_keep.extend(
+            plot.get_indices_of_interest(
+                dic_with_bb["df_tw_b1"], "ip" + str_ind_1, "ip" + str_ind_2
+            )
+        )
+
+    return plot.return_plot_lattice_with_tracking(
+        dic_with_bb["df_sv_b1"],
+        dic_with_bb["df_elements_corrected"],
+        dic_with_bb["df_tw_b1"],
+        df_sv_2=dic_with_bb["df_sv_b2"],
+        df_tw_2=dic_with_bb["df_tw_b2"],
+        l_indices_to_keep=l_indices_to_keep,
+    )
+
+
+def return_figures_footprint(dic_without_bb, dic_with_bb, render_mode):
+    """Return the four footprint figures (without and with beam-beam, for both beams)."""
+    l_figures = []
+    for dic, str_bb in zip([dic_without_bb, dic_with_bb], ["without", "with"]):
+        for beam in ["b1", "b2"]:
+            if dic["i_bunch_" + beam] is not None:
+                title = (
+                    f"Tune footprint {str_bb} beam-beam effects for beam {beam[1]} and bunch "
+                    + str(dic["i_bunch_" + beam])
+                )
+            else:
+                title = (
+                    f"Tune footprint {str_bb} beam-beam effects for beam {beam[1]} (bunch number"
+                    " unknown)"
+                )
+            l_figures.append(
+                plot.return_plot_footprint(
+                    dic["footprint_" + beam], title=title, render_mode=render_mode
+                )
+            )
+    return l_figures
+
+
+def return_figure_separation(dic, value):
+    """Return the separation figure in a given plane ("v", "h" or "||v+h||")."""
+    if value == "v" or value == "h":
+        return plot.return_plot_separation(dic["dic_sep_IPs"][value])
+    elif value == "||v+h||":
+        return plot.return_plot_separation_both_planes(
+            dic["dic_sep_IPs"]["v"], dic["dic_sep_IPs"]["h"]
+        )
+    else:
+        raise ValueError("value should be either v, h or ||v+h||")
+
+
+def return_figure_separation_3D(dic):
+    """Return the 3D separation figure."""
+    return plot.return_plot_separation_3D(dic["dic_bb_ho_IPs"])
+
+
+def return_dic_default_figures(dic_without_bb, dic_with_bb):
+    """Return all the figures of the dashboard for the default inputs, by name."""
+    dic_figures = {
+        "optics": return_figure_optics(dic_with_bb, DEFAULT_ZOOM_OPTICS),
+        "LHC_layout": return_figure_LHC_layout(dic_with_bb, DEFAULT_L_IPS_LAYOUT),
+    }
+
+    l_figures_footprint = return_figures_footprint(
+        dic_without_bb, dic_with_bb, DEFAULT_RENDER_MODE_FOOTPRINT
+    )
+    for name, fig in zip(return_l_names_footprint(), l_figures_footprint):
+        dic_figures[name] = fig
+
+    for bb, dic in zip(["On", "Off"], [dic_with_bb, dic_without_bb]):
+        for value in ["v", "h", "||v+h||"]:
+            dic_figures[return_name_separation(bb, value)] = return_figure_separation(dic, value)
+        dic_figures[f"separation_3D_{bb}"] = return_figure_separation_3D(dic)
+
+    return dic_figures
+
+
+def return_l_names_footprint():
+    """Return the names of the footprint figures, in the order of return_figures_footprint."""
+    return [
+        f"footprint_{str_bb}_bb_{beam}" for str_bb in ["without", "with"] for beam in ["b1", "b2"]
+    ]
+
+
+def return_name_separation(bb, value):
+    """Return the name of the separation figure for a given beam-beam state and plane."""
+    return f"separation_{bb}_" + {"v": "v", "h": "h", "||v+h||": "vh"}[value]
+
+
+# ==================================================================================================
+# --- Functions to compare the figures
+# ==================================================================================================
+def _return_json_figure(fig):
+    """Return a figure (a plotly figure or a dictionnary) as a dictionnary of JSON values."""
+    if hasattr(fig, "to_plotly_json"):
+        fig = fig.to_plotly_json()
+    return json.loads(json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder))
+
+
+def return_l_changes(fig_old, fig_new):
+    """Return the changes turning fig_old into fig_new, as a list of (path, value), e.g.
+    (("data", 0, "y"), [...]), if the figures have the same structure (same traces, with the same
+    properties, and same layout properties). Return None otherwise."""
+    fig_old, fig_new = _return_json_figure(fig_old), _return_json_figure(fig_new)
+    l_data_old, l_data_new = fig_old.get("data", []), fig_new.get("data", [])
+    if len(l_data_old) != len(l_data_new):
+        return None
+
+    l_changes = []
+    for idx, (trace_old, trace_new) in enumerate(zip(l_data_old, l_data_new)):
+        if trace_old.keys() != trace_new.keys() or trace_old.get("type") != trace_new.get("type"):
+            return None
+        for key, value in trace_new.items():
+            if value != trace_old[key]:
+                l_changes.append((("data", idx, key), value))
+
+    layout_old, layout_new = fig_old.get("layout", {}), fig_new.get("layout", {})
+    if layout_old.keys() != layout_new.keys():
+        return None
+    for key, value in layout_new.items():
+        if value != layout_old[key]:
+            l_changes.append((("layout", key), value))
+
+    return l_changes
+
+
+# ==================================================================================================
+# --- Functions to store and load the pre-rendered figures
+# ==================================================================================================
+def dump_figure_bundle(path_artifact, dic_figures):
+    """Store each figure as a compressed JSON file in the artifact directory."""
+    path_figures = os.path.join(path_artifact, NAME_FIGURES)
+    os.makedirs(path_figures, exist_ok=True)
+    for name, fig in dic_figures.items():
+        # Write in a temporary file first, then rename
+        fd, path_temp = tempfile.mkstemp(dir=path_figures, prefix=".tmp_")
+        with os.fdopen(fd, "wb") as f_raw, gzip.open(f_raw, "wt") as f:
+            json.dump(fig.to_plotly_json(), f, cls=plotly.utils.PlotlyJSONEncoder)
+        os.replace(path_temp, os.path.join(path_figures, name + ".json.gz"))
+
+
+def load_prerendered_figure(path_artifact, name):
+    """Return a pre-rendered figure (as a dictionnary) from the artifact directory, or None if it
+    hasn't been pre-rendered."""
+    if path_artifact is None:
+        return None
+    path_figure = os.path.join(path_artifact, NAME_FIGURES, name + ".json.gz")
+    if not os.path.isfile(path_figure):
+        return None
+    with gzip.open(path_figure, "rt") as f:
+        return json.load(f)
@@ -0,0 +1,24 @@
+# Gunicorn configuration to serve the dashboard, with:
+# gunicorn -c gunicorn.conf.py dashboard:server
+# The application (and the data of the collider) is loaded once in the master process, before
+# forking the workers, which then share the (read-only) data through copy-on-write. The number of
+# workers is therefore limited by the CPU rather than by the memory.
+import multiprocessing
+import os
+
+bind = os.environ.get("SIMBOARD_BIND", ":8080")
+workers = int(os.environ.get("SIMBOARD_WORKERS", multiprocessing.cpu_count()))
+
+# The memory budget of the cache of colliders of each worker is derived from the number of workers
+# (see store.py)
+os.environ["SIMBOARD_WORKERS"] = str(workers)
+preload_app = True
+timeout = 120
+
+
+def when_ready(server):
+    # Called in the master process, after loading the application and before forking the workers
+    import dashboard
+
+    dashboard.prepare_for_fork()
+    server.log.info("Collider data loaded and frozen before forking the workers.")
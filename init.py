@@ -3,22 +3,20 @@
 # --- Imports
 # ==================================================================================================import numpy as np
 import pandas as pd
-import xtrack as xt
 import numpy as np
-from dash import dash_table
-from dash.dash_table.Format import Format, Scheme
-import pickle
-import os
 import copy
 import logging
 import json
 
-# Module to compute beam-beam schedule
-import fillingpatterns as fp
+# Import functions to store the global variables
+import artifacts
 
-# Import collider and twiss functions
-from modules.twiss_check.twiss_check import TwissCheck
-from modules.build_collider.build_collider import BuildCollider
+# Import functions to maintain the summary index of the colliders
+import summary
+
+# The modules only needed to compute the global variables (xtrack, fillingpatterns, the collider
+# and twiss functions, the tracking functions and the figures) are imported in the functions using
+# them, so that loading the artifacts (e.g. when serving the dashboard) doesn't import them
 
 # ==================================================================================================
 # --- Functions initialize all global variables
@@ -30,124 +28,221 @@ from modules.build_collider.build_collider import BuildCollider
 """
 
 
-def init_from_collider(path_collider, load_global_variables_from_pickle=False):
+# Code of the family of each element (from the LHC naming convention), stored as an int8 categorical
+# in the "family" column of the survey, twiss and elements dataframes
+DIC_ELEMENT_FAMILIES = {
+    "other": 0,
+    "dipole": 1,
+    "quadrupole": 2,
+    "sextupole": 3,
+    "octupole": 4,
+    "ip": 5,
+    "bb_ho": 6,
+    "bb_lr": 7,
+}
+
+
+def return_dic_options(
+    compute_footprint_decomposition, compute_multibunch_footprint, compute_fma, compute_da
+):
+    """Return the options of the computation changing the content of an artifact."""
+    return {
+        "compute_footprint_decomposition": compute_footprint_decomposition,
+        "compute_multibunch_footprint": compute_multibunch_footprint,
+        "compute_fma": compute_fma,
+        "compute_da": compute_da,
+    }
+
+
+def init_from_collider(
+    path_collider,
+    load_global_variables_from_artifact=False,
+    compute_footprint_decomposition=False,
+    compute_multibunch_footprint=False,
+    compute_fma=False,
+    compute_da=False,
+    omp_num_threads="auto",
+    prerender_figures=False,
+):
     """Initialize the app variables from a given collider json file. All features related to the
     configuration will be deactivated."""
 
-    # Path to the pickle dictionnaries (for loading and saving)
-    path_pickle = "temp/" + path_collider.replace("/", "_") + "t_dic_var.pkl"
+    # Path to the artifact directory (for loading and saving), which depends on the options of the
+    # computation. When loading, it's resolved without reading the collider file if possible
+    dic_options = return_dic_options(
+        compute_footprint_decomposition, compute_multibunch_footprint, compute_fma, compute_da
+    )
+    path_artifact = artifacts.return_path_artifact_from_collider(
+        path_collider, dic_options, use_reference=load_global_variables_from_artifact
+    )
 
-    # Try to load the dictionnaries of variables from pickle
-    if load_global_variables_from_pickle:
-        # Check that the pickle file exists
-        if not os.path.isfile(path_pickle):
-            raise ValueError("The pickle file does not exist.")
-        with open(path_pickle, "rb") as f:
-            dic_without_bb, dic_with_bb = pickle.load(f)
-        print("Returning global variables from pickle file.")
-        return dic_without_bb, dic_with_bb, path_pickle
+    # Try to load the dictionnaries of variables from the artifact
+    if load_global_variables_from_artifact:
+        # Check that the artifact exists
+        if not artifacts.artifact_exists(path_artifact):
+            raise ValueError("The artifact does not exist.")
+        dic_without_bb, dic_with_bb = artifacts.load_artifact(path_artifact)
+        print("Returning global variables from artifact.")
+        return dic_without_bb, dic_with_bb, path_artifact
 
     else:
-        # Rebuild collider
-        # collider = xt.Multiline.from_json(path_collider)
-        with open(path_collider, "r") as fid:
-            collider_dict = json.load(fid)
-        if "config_yaml" in collider_dict:
-            print("A configuration has been found in the collider file. Using it.")
-            config = collider_dict["config_yaml"]
-        else:
-            print(
-                "Warning, you provided a collider file without a configuration. Some features of"
-                " the dashboard will be missing."
+        # Only one worker computes a given artifact at a time. If it has been written by another
+        # worker while waiting for the lock, it is loaded rather than computed again.
+        artifact_existed = artifacts.artifact_exists(path_artifact)
+        with artifacts.artifact_lock(path_artifact):
+            if not artifact_existed and artifacts.artifact_exists(path_artifact):
+                dic_without_bb, dic_with_bb = artifacts.load_artifact(path_artifact)
+                print("Returning global variables from artifact computed by another worker.")
+                return dic_without_bb, dic_with_bb, path_artifact
+
+            # Rebuild collider
+            import xtrack as xt
+
+            # collider = xt.Multiline.from_json(path_collider)
+            with open(path_collider, "r") as fid:
+                collider_dict = json.load(fid)
+            if "config_yaml" in collider_dict:
+                print("A configuration has been found in the collider file. Using it.")
+                config = collider_dict["config_yaml"]
+            else:
+                print(
+                    "Warning, you provided a collider file without a configuration. Some features"
+                    " of the dashboard will be missing."
+                )
+                config = None
+            collider = xt.Multiline.from_dict(collider_dict)
+            collider.build_trackers()
+
+            # Build collider before bb
+            collider_without_bb = xt.Multiline.from_dict(collider_dict)
+            collider_without_bb.build_trackers()
+            collider_without_bb.vars["beambeam_scale"] = 0
+
+            # Compute twiss checks
+            twiss_check_after_beam_beam, twiss_check_without_beam_beam = compute_twiss_checks(
+                path_config=None,
+                path_collider=None,
+                path_collider_without_bb=None,
+                force_build_collider=False,
+                config=config,
+                collider=collider,
+                collider_without_bb=collider_without_bb,
             )
-            config = None
-        collider = xt.Multiline.from_dict(collider_dict)
-        collider.build_trackers()
-
-        # Build collider before bb
-        collider_without_bb = xt.Multiline.from_dict(collider_dict)
-        collider_without_bb.build_trackers()
-        collider_without_bb.vars["beambeam_scale"] = 0
-
-        # Compute twiss checks
-        twiss_check_after_beam_beam, twiss_check_without_beam_beam = compute_twiss_checks(
-            path_config=None,
-            path_collider=None,
-            path_collider_without_bb=None,
-            force_build_collider=False,
-            config=config,
-            collider=collider,
-            collider_without_bb=collider_without_bb,
-        )
 
-        # Compute global variables
-        dic_without_bb, dic_with_bb = compute_global_variables_from_twiss_checks(
-            twiss_check_after_beam_beam,
-            twiss_check_without_beam_beam,
-            path_pickle=path_pickle,
-        )
+            # Compute global variables
+            dic_without_bb, dic_with_bb = compute_global_variables_from_twiss_checks(
+                twiss_check_after_beam_beam,
+                twiss_check_without_beam_beam,
+                path_artifact=path_artifact,
+                dic_metadata={
+                    "path_collider": path_collider,
+                    "label": artifacts.return_artifact_label(path_collider=path_collider),
+                    "options": dic_options,
+                },
+                compute_footprint_decomposition=compute_footprint_decomposition,
+                compute_multibunch_footprint=compute_multibunch_footprint,
+                compute_fma=compute_fma,
+                compute_da=compute_da,
+                omp_num_threads=omp_num_threads,
+                prerender_figures=prerender_figures,
+            )
 
-        return dic_without_bb, dic_with_bb, path_pickle
+            return dic_without_bb, dic_with_bb, path_artifact
 
 
 def init_from_config(
-    path_config, force_build_collider=False, load_global_variables_from_pickle=False
+    path_config,
+    force_build_collider=False,
+    load_global_variables_from_artifact=False,
+    compute_footprint_decomposition=False,
+    compute_multibunch_footprint=False,
+    compute_fma=False,
+    compute_da=False,
+    omp_num_threads="auto",
+    prerender_figures=False,
 ):
     """Initialize the app variables from a given generation 2 collider configuration file.
     The generation 1 json collider file must exist."""
 
-    # Path to the pickle dictionnaries (for loading and saving)
-    path_pickle = (
-        "temp/"
-        + path_config.split("/scans/")[1].split("config.yaml")[0].replace("/", "_")
-        + "t_dic_var.pkl"
+    # Get the path to the collider object (unless it's built from the configuration)
+    if force_build_collider:
+        path_collider = None
+    else:
+        path_collider = (
+            "temp/"
+            + path_config.split("/scans/")[1].split("config.yaml")[0].replace("/", "_")
+            + "collider.json"
+        )
+
+    # Path to the artifact directory (for loading and saving), which depends on the options of the
+    # computation. When loading, it's resolved without reading the source files if possible
+    dic_options = return_dic_options(
+        compute_footprint_decomposition, compute_multibunch_footprint, compute_fma, compute_da
+    )
+    path_artifact = artifacts.return_path_artifact_from_config(
+        path_config, path_collider, dic_options, use_reference=load_global_variables_from_artifact
     )
 
-    # Try to load the dictionnaries of variables from pickle
-    if load_global_variables_from_pickle:
+    # Try to load the dictionnaries of variables from the artifact
+    if load_global_variables_from_artifact:
         # Raise error if a collider must be built
         if force_build_collider:
-            raise ValueError("If load_from_pickle is True, force_build_collider must be False.")
-
-        # Check that the pickle file exists
-        if not os.path.isfile(path_pickle):
-            raise ValueError("The pickle file does not exist.")
-        with open(path_pickle, "rb") as f:
-            dic_without_bb, dic_with_bb = pickle.load(f)
-        print("Returning global variables from pickle file.")
+            raise ValueError(
+                "If load_global_variables_from_artifact is True, force_build_collider must be"
+                " False."
+            )
+
+        # Check that the artifact exists
+        if not artifacts.artifact_exists(path_artifact):
+            raise ValueError("The artifact does not exist.")
+        dic_without_bb, dic_with_bb = artifacts.load_artifact(path_artifact)
+        print("Returning global variables from artifact.")
         return dic_without_bb, dic_with_bb
 
     else:
-        # If a collider is being built, explictely set the paths to None
-        if force_build_collider:
-            path_collider = None
-            path_collider_without_bb = None
-        else:
-            # Get the path to the collider object
-            path_collider = (
-                "temp/"
-                + path_config.split("/scans/")[1].split("config.yaml")[0].replace("/", "_")
-                + "collider.json"
-            )
+        # Only one worker computes a given artifact at a time. If it has been written by another
+        # worker while waiting for the lock, it is loaded rather than computed again.
+        artifact_existed = artifacts.artifact_exists(path_artifact)
+        with artifacts.artifact_lock(path_artifact):
+            if not artifact_existed and artifacts.artifact_exists(path_artifact):
+                dic_without_bb, dic_with_bb = artifacts.load_artifact(path_artifact)
+                print("Returning global variables from artifact computed by another worker.")
+                return dic_without_bb, dic_with_bb
+
             # Also get a path to the collider after beam-beam object
-            path_collider_without_bb = path_collider.replace(".json", "_without_bb.json")
-
-        # Compute twiss checks
-        twiss_check_after_beam_beam, twiss_check_without_beam_beam = compute_twiss_checks(
-            path_config=path_config,
-            path_collider=path_collider,
-            path_collider_without_bb=path_collider_without_bb,
-            force_build_collider=force_build_collider,
-        )
+            if force_build_collider:
+                path_collider_without_bb = None
+            else:
+                path_collider_without_bb = path_collider.replace(".json", "_without_bb.json")
+
+            # Compute twiss checks
+            twiss_check_after_beam_beam, twiss_check_without_beam_beam = compute_twiss_checks(
+                path_config=path_config,
+                path_collider=path_collider,
+                path_collider_without_bb=path_collider_without_bb,
+                force_build_collider=force_build_collider,
+            )
 
-        # Compute global variables
-        dic_without_bb, dic_with_bb = compute_global_variables_from_twiss_checks(
-            twiss_check_after_beam_beam,
-            twiss_check_without_beam_beam,
-            path_pickle=path_pickle,
-        )
+            # Compute global variables
+            dic_without_bb, dic_with_bb = compute_global_variables_from_twiss_checks(
+                twiss_check_after_beam_beam,
+                twiss_check_without_beam_beam,
+                path_artifact=path_artifact,
+                dic_metadata={
+                    "path_config": path_config,
+                    "path_collider": path_collider,
+                    "label": artifacts.return_artifact_label(path_config=path_config),
+                    "options": dic_options,
+                },
+                compute_footprint_decomposition=compute_footprint_decomposition,
+                compute_multibunch_footprint=compute_multibunch_footprint,
+                compute_fma=compute_fma,
+                compute_da=compute_da,
+                omp_num_threads=omp_num_threads,
+                prerender_figures=prerender_figures,
+            )
 
-        return dic_without_bb, dic_with_bb
+            return dic_without_bb, dic_with_bb
 
 
 def compute_twiss_checks(
@@ -225,24 +320,68 @@ def compute_twiss_checks(
 
 
 def compute_global_variables_from_twiss_checks(
-    twiss_check_after_beam_beam, twiss_check_without_beam_beam, path_pickle=None
+    twiss_check_after_beam_beam,
+    twiss_check_without_beam_beam,
+    path_artifact=None,
+    dic_metadata=None,
+    compute_footprint_decomposition=False,
+    compute_multibunch_footprint=False,
+    compute_fma=False,
+    compute_da=False,
+    omp_num_threads="auto",
+    prerender_figures=False,
 ):
-    # Get the global variables before and after the beam-beam
-    dic_with_bb = initialize_global_variables(twiss_check_after_beam_beam, compute_footprint=True)
+    # Get the global variables before and after the beam-beam (the footprint decomposition and the
+    # dynamic aperture estimate only make sense with beam-beam)
+    dic_with_bb = initialize_global_variables(
+        twiss_check_after_beam_beam,
+        compute_footprint=True,
+        compute_footprint_decomposition=compute_footprint_decomposition,
+        compute_multibunch_footprint=compute_multibunch_footprint,
+        compute_fma=compute_fma,
+        compute_da=compute_da,
+        omp_num_threads=omp_num_threads,
+    )
     dic_without_bb = initialize_global_variables(
-        twiss_check_without_beam_beam, compute_footprint=True
+        twiss_check_without_beam_beam,
+        compute_footprint=True,
+        compute_fma=compute_fma,
+        omp_num_threads=omp_num_threads,
     )
 
-    if path_pickle is not None:
-        # Dump the dictionnaries in a pickle file
-        print("Dumping global variables in a pickle file.")
-        with open(path_pickle, "wb") as f:
-            pickle.dump((dic_without_bb, dic_with_bb), f)
+    if path_artifact is not None:
+        # Dump the dictionnaries in an artifact directory
+        print("Dumping global variables in an artifact.")
+        artifacts.dump_artifact(path_artifact, dic_without_bb, dic_with_bb, dic_metadata)
+
+        # Add the collider to the summary index
+        summary.append_to_summary(
+            path_artifact,
+            dic_metadata.get("label") if dic_metadata is not None else None,
+            summary.return_summary_row(
+                dic_with_bb, summary.return_knobs_summary(twiss_check_after_beam_beam.collider)
+            ),
+        )
+
+        # Serve the compact variables from the artifact rather than the full ones
+        dic_without_bb, dic_with_bb = artifacts.load_artifact(path_artifact)
+
+        # Pre-render the figures for the default inputs of the dashboard if requested
+        if prerender_figures:
+            import figures
+
+            print("Pre-rendering the figures of the dashboard.")
+            figures.dump_figure_bundle(
+                path_artifact, figures.return_dic_default_figures(dic_without_bb, dic_with_bb)
+            )
 
     return dic_without_bb, dic_with_bb
 
 
 def initialize_twiss_checks_configuring_new_collider(path_config):
+    from modules.build_collider.build_collider import BuildCollider
+    from modules.twiss_check.twiss_check import TwissCheck
+
     # Build collider from config file
     build_collider = BuildCollider(path_config)
 
@@ -263,6 +402,9 @@ def initialize_twiss_checks_configuring_new_collider(path_config):
 def initialize_twiss_checks_from_temp_collider_paths(
     path_config, path_collider, path_collider_without_bb
 ):
+    import xtrack as xt
+    from modules.twiss_check.twiss_check import TwissCheck
+
     # Rebuild the collider from the json file
     collider = xt.Multiline.from_json(path_collider)
     collider.build_trackers()
@@ -281,13 +423,28 @@ def initialize_twiss_checks_from_temp_collider_paths(
 
 def initialize_twiss_checks_from_collider_objects(collider, collider_without_bb, config=None):
     """config is either None or a dictionnary. If None, the twiss_check is built without it."""
+    from modules.twiss_check.twiss_check import TwissCheck
+
     twiss_check_with_bb = TwissCheck(collider, configuration=config)
     twiss_check_without_bb = TwissCheck(collider_without_bb, configuration=config)
     return twiss_check_with_bb, twiss_check_without_bb
 
 
-def initialize_global_variables(twiss_check, compute_footprint=True):
-    """Initialize global variables, from a collider with beam-beam set."""
+def initialize_global_variables(
+    twiss_check,
+    compute_footprint=True,
+    compute_footprint_decomposition=False,
+    compute_multibunch_footprint=False,
+    compute_fma=False,
+    compute_da=False,
+    omp_num_threads="auto",
+):
+    """Initialize global variables, from a collider with beam-beam set. The tracking-based
+    products are computed in pools of processes, each tracking with omp_num_threads threads
+    ("auto" to share the cores between the workers)."""
+    import fillingpatterns as fp
+
+    import tracking
 
     # Get luminosity at each IP
     if twiss_check.configuration is not None:
@@ -309,6 +466,7 @@ def initialize_global_variables(twiss_check, compute_footprint=True):
         patt = fp.FillingPattern.from_json(twiss_check.path_filling_scheme)
         patt.compute_beam_beam_schedule(n_lr_per_side=26)
         bbs = patt.b1.bb_schedule
+        bbs_b2 = patt.b2.bb_schedule
 
         # Get polarity Alice and LHCb
         polarity_alice, polarity_lhcb = twiss_check.return_polarity_ip_2_8()
@@ -323,6 +481,7 @@ def initialize_global_variables(twiss_check, compute_footprint=True):
         i_bunch_b1 = None
         i_bunch_b2 = None
         bbs = None
+        bbs_b2 = None
         polarity_alice = None
         polarity_lhcb = None
         configuration_str = None
@@ -345,12 +504,6 @@ def initialize_global_variables(twiss_check, compute_footprint=True):
         df_elements_corrected,
     ) = return_all_loaded_variables(collider=twiss_check.collider)
 
-    # Get corresponding data tables
-    table_sv_b1 = return_data_table(df_sv_b1, "id-df-sv-b1-after-bb", twiss=False)
-    table_tw_b1 = return_data_table(df_tw_b1, "id-df-tw-b1-after-bb", twiss=True)
-    table_sv_b2 = return_data_table(df_sv_b2, "id-df-sv-b2-after-bb", twiss=False)
-    table_tw_b2 = return_data_table(df_tw_b2, "id-df-tw-b2-after-bb", twiss=True)
-
     # Get the twiss dictionnary (tune, chroma, etc + twiss at IPs)
     dic_tw_b1 = return_twiss_dic(tw_b1)
     dic_tw_b2 = return_twiss_dic(tw_b2)
@@ -360,16 +513,66 @@ def initialize_global_variables(twiss_check, compute_footprint=True):
     energy = twiss_check.collider.lhcb1.particle_ref._p0c[0] / 1e9
     dic_sep_IPs = return_separation_dic(dic_bb_ho_IPs, tw_b1, nemitt_x, nemitt_y, energy)
 
-    # Get the footprint only if bb is on
+    # Keep track of the context used for each tracking-based product
+    dic_tracking_contexts = {}
+
+    # Get the footprints (and their decomposition if requested), all computed in parallel
+    footprint_decomposition_b1 = None
+    footprint_decomposition_b2 = None
+    footprint_multibunch_b1 = None
+    footprint_multibunch_b2 = None
     if compute_footprint:
-        array_qx1, array_qy1 = return_footprint(collider, nemitt_x, beam="lhcb1", n_turns=2000)
-        array_qx2, array_qy2 = return_footprint(collider, nemitt_x, beam="lhcb2", n_turns=2000)
+        # The multi-bunch footprints require the beam-beam schedule
+        if compute_multibunch_footprint and bbs is not None:
+            dic_bb_schedules = {"lhcb1": bbs, "lhcb2": bbs_b2}
+        else:
+            dic_bb_schedules = None
+        dic_footprints, dic_multibunch, context = tracking.return_footprints(
+            collider,
+            nemitt_x,
+            n_turns=2000,
+            decomposition=compute_footprint_decomposition,
+            dic_bb_schedules=dic_bb_schedules,
+            omp_num_threads=omp_num_threads,
+        )
+        dic_tracking_contexts["footprint"] = context
+        array_qx1, array_qy1 = dic_footprints["lhcb1"]["All beam-beam"]
+        array_qx2, array_qy2 = dic_footprints["lhcb2"]["All beam-beam"]
+        if len(dic_footprints["lhcb1"]) > 1:
+            footprint_decomposition_b1 = dic_footprints["lhcb1"]
+            footprint_decomposition_b2 = dic_footprints["lhcb2"]
+        footprint_multibunch_b1 = dic_multibunch["lhcb1"]
+        footprint_multibunch_b2 = dic_multibunch["lhcb2"]
     else:
         array_qx1 = np.array([])
         array_qy1 = np.array([])
         array_qx2 = np.array([])
         array_qy2 = np.array([])
 
+    # Get the frequency map analysis if requested
+    if compute_fma:
+        dic_fma, context = tracking.return_fma(
+            collider, nemitt_x, n_turns=1024, omp_num_threads=omp_num_threads
+        )
+        dic_tracking_contexts["fma"] = context
+        fma_b1 = dic_fma["lhcb1"]
+        fma_b2 = dic_fma["lhcb2"]
+    else:
+        fma_b1 = None
+        fma_b2 = None
+
+    # Get a quick estimate of the dynamic aperture if requested
+    if compute_da:
+        dic_da, context = tracking.return_da(
+            collider, nemitt_x, n_turns=1000, omp_num_threads=omp_num_threads
+        )
+        dic_tracking_contexts["da"] = context
+        da_b1 = dic_da["lhcb1"]
+        da_b2 = dic_da["lhcb2"]
+    else:
+        da_b1 = None
+        da_b2 = None
+
     # Store everything in a dictionnary
     dic_global_var = {
         "l_lumi": l_lumi,
@@ -382,10 +585,6 @@ def initialize_global_variables(twiss_check, compute_footprint=True):
         "df_tw_b1": df_tw_b1,
         "df_tw_b2": df_tw_b2,
         "df_elements_corrected": df_elements_corrected,
-        "table_sv_b1": table_sv_b1,
-        "table_tw_b1": table_tw_b1,
-        "table_sv_b2": table_sv_b2,
-        "table_tw_b2": table_tw_b2,
         "array_b1": array_b1,
         "array_b2": array_b2,
         "i_bunch_b1": i_bunch_b1,
@@ -393,6 +592,15 @@ def initialize_global_variables(twiss_check, compute_footprint=True):
         "bbs": bbs,
         "footprint_b1": (array_qx1, array_qy1),
         "footprint_b2": (array_qx2, array_qy2),
+        "footprint_decomposition_b1": footprint_decomposition_b1,
+        "footprint_decomposition_b2": footprint_decomposition_b2,
+        "footprint_multibunch_b1": footprint_multibunch_b1,
+        "footprint_multibunch_b2": footprint_multibunch_b2,
+        "fma_b1": fma_b1,
+        "fma_b2": fma_b2,
+        "da_b1": da_b1,
+        "da_b2": da_b2,
+        "tracking_contexts": dic_tracking_contexts,
         "polarity_alice": polarity_alice,
         "polarity_lhcb": polarity_lhcb,
         "configuration_str": configuration_str,
@@ -474,6 +682,29 @@ def return_dataframe_corrected_for_thin_lens_approx(df_elements, df_tw):
     return df_elements_corrected
 
 
+def return_element_families(s_names):
+    """Return the family (see DIC_ELEMENT_FAMILIES) of each element name, as a categorical whose
+    codes are the family codes."""
+    s_names = s_names.astype(str)
+    l_conditions = [
+        s_names.str.startswith("mb."),
+        s_names.str.startswith("mq"),
+        s_names.str.startswith("ms"),
+        s_names.str.startswith("mo"),
+        s_names.str.startswith("ip"),
+        s_names.str.startswith("bb_ho"),
+        s_names.str.startswith("bb_lr"),
+    ]
+    l_codes = [
+        DIC_ELEMENT_FAMILIES[family]
+        for family in ["dipole", "quadrupole", "sextupole", "octupole", "ip", "bb_ho", "bb_lr"]
+    ]
+    array_codes = np.select(l_conditions, l_codes, default=DIC_ELEMENT_FAMILIES["other"])
+    return pd.Categorical.from_codes(
+        array_codes.astype(np.int8), categories=list(DIC_ELEMENT_FAMILIES)
+    )
+
+
 def return_all_loaded_variables(collider):
     """Return all loaded variables if they are not already loaded."""
 
@@ -492,6 +723,13 @@ def return_all_loaded_variables(collider):
     # Correct df elements for thin lens approximation
     df_elements_corrected = return_dataframe_corrected_for_thin_lens_approx(df_elements, df_tw_b1)
 
+    # Precompute the family of each element (the elements are named from the twiss of beam 1)
+    for df in [df_sv_b1, df_tw_b1, df_sv_b2, df_tw_b2]:
+        df["family"] = return_element_families(df["name"])
+    df_elements_corrected["family"] = return_element_families(
+        df_tw_b1["name"].reindex(df_elements_corrected.index)
+    )
+
     # Return all variables
     return (
         collider,
@@ -695,79 +933,3 @@ def return_separation_dic(dic_bb_ho_IPs, tw_b1, nemitt_x, nemitt_y, energy):
             "sigma": sigma,
         }
     return dic_sep_IPs
-
-
-# ==================================================================================================
-# --- Functions to build data tables
-# ==================================================================================================
-def return_data_table(df, id_table, twiss=True):
-    if twiss:
-        df = df.drop(["W_matrix"], axis=1)
-        idx_column_name = 0
-    else:
-        idx_column_name = 6
-
-    # Change order of columns such that name is first
-    df = df[["name"] + [col for col in df.columns if col != "name"]]
-
-    table = (
-        dash_table.DataTable(
-            id=id_table,
-            columns=[
-                (
-                    {
-                        "name": i,
-                        "id": i,
-                        "deletable": False,
-                        "type": "numeric",
-                        "format": Format(precision=6, scheme=Scheme.decimal_or_exponent),
-                    }
-                    if idx != idx_column_name
-                    else {"name": i, "id": i, "deletable": False}
-                )
-                for idx, i in enumerate(df.columns)
-            ],
-            data=df.to_dict("records"),
-            editable=False,
-            filter_action="native",
-            sort_action="native",
-            sort_mode="multi",
-            row_selectable=False,
-            row_deletable=False,
-            # page_action="none",
-            # fixed_rows={"headers": True, "data": 0},
-            # fixed_columns={"headers": True, "data": 1},
-            virtualization=False,
-            page_size=25,
-            style_table={
-                # "height": "100%",
-                "maxHeight": "75vh",
-                "margin-x": "auto",
-                "margin-top": "20px",
-                "overflowY": "auto",
-                "overflowX": "auto",
-                "minWidth": "98%",
-                "padding": "1em",
-            },
-            style_header={"backgroundColor": "rgb(30, 30, 30)", "color": "white", "padding": "1em"},
-            style_data={"backgroundColor": "rgb(50, 50, 50)", "color": "white"},
-            style_filter={"backgroundColor": "rgb(70, 70, 70)"},  # , "color": "white"},
-            style_cell={"font-family": "sans-serif", "minWidth": 95},
-        ),
-    )
-    return table
-
-
-def return_footprint(collider, emittance, beam="lhcb1", n_turns=2000):
-    fp_polar_xm = collider[beam].get_footprint(
-        nemitt_x=emittance,
-        nemitt_y=emittance,
-        n_turns=n_turns,
-        linear_rescale_on_knobs=[xt.LinearRescale(knob_name="beambeam_scale", v0=0.0, dv=0.05)],
-        freeze_longitudinal=True,
-    )
-
-    qx = fp_polar_xm.qx
-    qy = fp_polar_xm.qy
-
-    return qx, qy
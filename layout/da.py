@@ -0,0 +1,39 @@
+#################### Imports ####################
+
+# Import standard libraries
+import dash_mantine_components as dmc
+from dash import dcc
+
+#################### DA Layout ####################
+
+
+def return_da_layout():
+    da_layout = dmc.Stack(
+        children=[
+            dmc.Alert(
+                (
+                    "Dynamic aperture estimate not available as it was not computed when building"
+                    " the dashboard"
+                ),
+                title="No dynamic aperture estimate!",
+                id="da-alert",
+                style={"margin": "auto", "display": "none"},
+            ),
+            dcc.Loading(
+                dcc.Graph(
+                    id="da-graph",
+                    mathjax=True,
+                    config={
+                        "displayModeBar": False,
+                        "scrollZoom": True,
+                        "responsive": True,
+                        "displaylogo": False,
+                    },
+                    style={"height": "80vh", "width": "100%", "margin": "auto"},
+                ),
+                type="circle",
+                color="cyan",
+            ),
+        ]
+    )
+    return da_layout
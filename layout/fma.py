@@ -0,0 +1,83 @@
+#################### Imports ####################
+
+# Import standard libraries
+import dash_mantine_components as dmc
+from dash import dcc
+
+#################### FMA Layout ####################
+
+
+def return_fma_layout():
+    fma_layout = (
+        dmc.Center(
+            dmc.Stack(
+                children=[
+                    dmc.Center(
+                        children=[
+                            dmc.Group(
+                                children=[
+                                    dmc.Text("Beam-beam: "),
+                                    dmc.ChipGroup(
+                                        [
+                                            dmc.Chip(
+                                                x,
+                                                value=x,
+                                                variant="outline",
+                                                color="cyan",
+                                            )
+                                            for x in ["On", "Off"]
+                                        ],
+                                        id="chips-fma-bb",
+                                        value="On",
+                                        mb=0,
+                                    ),
+                                ],
+                                pt=5,
+                            ),
+                        ],
+                    ),
+                    dmc.Alert(
+                        (
+                            "Frequency map analysis not available as it was not computed when"
+                            " building the dashboard"
+                        ),
+                        title="No frequency map analysis!",
+                        id="fma-alert",
+                        style={"margin": "auto", "display": "none"},
+                    ),
+                    dcc.Loading(
+                        children=[
+                            dcc.Graph(
+                                id="fma-b1",
+                                mathjax=True,
+                                config={
+                                    "displayModeBar": False,
+                                    "scrollZoom": True,
+                                    "responsive": True,
+                                    "displaylogo": False,
+                                },
+                                style={"height": "45vh", "width": "100%", "margin": "auto"},
+                            ),
+                            dcc.Graph(
+                                id="fma-b2",
+                                mathjax=True,
+                                config={
+                                    "displayModeBar": False,
+                                    "scrollZoom": True,
+                                    "responsive": True,
+                                    "displaylogo": False,
+                                },
+                                style={"height": "45vh", "width": "100%", "margin": "auto"},
+                            ),
+                        ],
+                        type="circle",
+                        color="cyan",
+                        style={"height": "100%", "width": "100%", "margin": "auto"},
+                        parent_style={"height": "100%", "width": "100%", "margin": "auto"},
+                    ),
+                ],
+                style={"width": "100%", "margin": "auto"},
+            )
+        ),
+    )
+    return fma_layout
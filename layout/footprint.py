@@ -15,6 +15,30 @@ def return_footprint_layout():
         dmc.Center(
             dmc.Stack(
                 children=[
+                    dmc.Center(
+                        children=[
+                            dmc.Group(
+                                children=[
+                                    dmc.Text("Rendering: "),
+                                    dmc.ChipGroup(
+                                        [
+                                            dmc.Chip(
+                                                x,
+                                                value=x,
+                                                variant="outline",
+                                                color="cyan",
+                                            )
+                                            for x in ["Auto", "Scatter", "Density"]
+                                        ],
+                                        id="chips-footprint-render-mode",
+                                        value="Auto",
+                                        mb=0,
+                                    ),
+                                ],
+                                pt=5,
+                            ),
+                        ],
+                    ),
                     dcc.Loading(
                         children=[
                             dmc.Group(
@@ -75,6 +99,69 @@ def return_footprint_layout():
                         style={"height": "100%", "width": "100%", "margin": "auto"},
                         parent_style={"height": "100%", "width": "100%", "margin": "auto"},
                     ),
+                    dmc.Alert(
+                        (
+                            "The footprint decomposition is not available for this collider, as it"
+                            " has no beam-beam lenses or was not computed."
+                        ),
+                        title="No footprint decomposition!",
+                        id="footprint-decomposition-alert",
+                        style={"margin": "auto", "display": "none"},
+                    ),
+                    dcc.Loading(
+                        children=[
+                            dmc.Group(
+                                id="footprint-decomposition-group",
+                                children=[
+                                    dcc.Graph(
+                                        id="footprint-decomposition-b1",
+                                        mathjax=True,
+                                        config={
+                                            "displayModeBar": False,
+                                            "scrollZoom": True,
+                                            "responsive": True,
+                                            "displaylogo": False,
+                                        },
+                                        style={"height": "45vh", "width": "45%", "margin": "auto"},
+                                    ),
+                                    dcc.Graph(
+                                        id="footprint-decomposition-b2",
+                                        mathjax=True,
+                                        config={
+                                            "displayModeBar": False,
+                                            "scrollZoom": True,
+                                            "responsive": True,
+                                            "displaylogo": False,
+                                        },
+                                        style={"height": "45vh", "width": "45%", "margin": "auto"},
+                                    ),
+                                ],
+                            ),
+                        ],
+                        type="circle",
+                        color="cyan",
+                        style={"height": "100%", "width": "100%", "margin": "auto"},
+                        parent_style={"height": "100%", "width": "100%", "margin": "auto"},
+                    ),
+                    dcc.Loading(
+                        children=[
+                            dcc.Graph(
+                                id="footprint-multibunch",
+                                mathjax=True,
+                                config={
+                                    "displayModeBar": False,
+                                    "scrollZoom": True,
+                                    "responsive": True,
+                                    "displaylogo": False,
+                                },
+                                style={"height": "60vh", "width": "100%", "margin": "auto"},
+                            ),
+                        ],
+                        type="circle",
+                        color="cyan",
+                        style={"height": "100%", "width": "100%", "margin": "auto"},
+                        parent_style={"height": "100%", "width": "100%", "margin": "auto"},
+                    ),
                 ],
                 style={"width": "100%", "margin": "auto"},
             )
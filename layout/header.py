@@ -1,32 +1,10 @@
 #################### Imports ####################
 # Import standard libraries
-import os
 import dash_mantine_components as dmc
 from dash_iconify import DashIconify
 
-
-#################### Functions to load collider choices ####################
-def set_collider_dropdown_options():
-    l_data = []
-    for x in sorted(os.listdir("temp/")):
-        try:
-            id_collider = int(x.split("optics_")[1].split("_xtrack")[0].split("_")[-1]) + 23
-            data = {
-                "value": os.path.join("temp", x),
-                "label": x.split("optics_")[1].split("_xtrack")[0][:-2] + f"{id_collider}",
-            }
-            l_data.append(data)
-        except:
-            pass
-    return l_data
-
-
-def return_initial_pickle_path(l_data):
-    return l_data[0]["value"]
-
-
-l_data = set_collider_dropdown_options()
-initial_pickle_path = return_initial_pickle_path(l_data)
+# Import the catalog of colliders
+import catalog
 
 
 #################### Header Layout ####################
@@ -71,12 +49,15 @@ def return_header_layout():
                             value="display-configuration",
                             data=[
                                 {"value": "display-configuration", "label": "Configuration"},
+                                {"value": "display-overview", "label": "Scan overview"},
                                 {"value": "display-twiss", "label": "Twiss"},
                                 {"value": "display-scheme", "label": "Scheme"},
                                 {"value": "display-sanity", "label": "Sanity checks"},
                                 {"value": "display-separation", "label": "Separation"},
                                 {"value": "display-3D-separation", "label": "3D separation"},
                                 {"value": "display-footprint", "label": "Footprint"},
+                                {"value": "display-fma", "label": "FMA"},
+                                {"value": "display-da", "label": "DA"},
                                 {"value": "display-optics", "label": "Optics"},
                                 {"value": "display-survey", "label": "Survey"},
                             ],
@@ -90,11 +71,18 @@ def return_header_layout():
                             id="group-collider-dropdown",
                             children=[
                                 # dmc.Text("Preloaded collider: "),
+                                # The options are searched on the server (see catalog.py)
+                                dmc.TextInput(
+                                    id="search-preloaded-collider",
+                                    placeholder="Filter, e.g. on_x1>=200",
+                                    debounce=300,
+                                    size="sm",
+                                ),
                                 dmc.Select(
                                     id="select-preloaded-collider",
-                                    data=l_data,
-                                    value=initial_pickle_path,
+                                    data=[],
                                     searchable=True,
+                                    limit=catalog.N_MATCHES_MAX,
                                     nothingFound="No options found",
                                     size="sm",
                                     # style={"width": 200},
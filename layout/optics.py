@@ -13,6 +13,8 @@ import plot
 def return_optics_layout(dic_with_bb):
     optics_layout = html.Div(
         children=[
+            # Inputs of the figure displayed, to update it partially when only the zoom changes
+            dcc.Store(id="store-optics-figure"),
             dcc.Loading(
                 dcc.Graph(
                     id="LHC-2D-near-IP",
@@ -0,0 +1,71 @@
+#################### Imports ####################
+
+# Import standard libraries
+import dash_mantine_components as dmc
+from dash import dcc
+
+# Import table functions
+from layout.tables import return_data_table
+
+#################### Overview Layout ####################
+
+
+def return_overview_layout(df_summary, l_columns_id):
+    """Return the layout of the scan overview, from the summary index of the colliders."""
+    if len(df_summary) == 0:
+        return dmc.Alert(
+            "No collider has been added to the summary index yet. It's filled when building the"
+            " artifacts.",
+            title="Empty summary index!",
+            style={"margin": "auto", "width": "50%"},
+        )
+
+    # Numeric columns that can be used for the heatmaps, with sensible defaults
+    l_columns = [column for column in df_summary.columns if column not in l_columns_id]
+    default_x = "qx_b1" if "qx_b1" in l_columns else l_columns[0]
+    default_y = "qy_b1" if "qy_b1" in l_columns else l_columns[-1]
+    default_z = "footprint_qx_spread_b1" if "footprint_qx_spread_b1" in l_columns else l_columns[0]
+
+    overview_layout = dmc.Stack(
+        children=[
+            dmc.Center(
+                dmc.Group(
+                    children=[
+                        dmc.Select(
+                            id="select-overview-" + axis,
+                            label=label,
+                            data=l_columns,
+                            value=default,
+                            searchable=True,
+                            size="sm",
+                            style={"width": 220},
+                        )
+                        for axis, label, default in zip(
+                            ["x", "y", "z"],
+                            ["Horizontal axis", "Vertical axis", "Color"],
+                            [default_x, default_y, default_z],
+                        )
+                    ],
+                    pt=5,
+                ),
+            ),
+            dcc.Loading(
+                dcc.Graph(
+                    id="overview-heatmap",
+                    mathjax=True,
+                    config={
+                        "displayModeBar": False,
+                        "scrollZoom": True,
+                        "responsive": True,
+                        "displaylogo": False,
+                    },
+                    style={"height": "50vh", "width": "100%", "margin": "auto"},
+                ),
+                type="circle",
+                color="cyan",
+            ),
+            return_data_table(df_summary.drop(columns=["path_artifact"]), "id-overview-table"),
+        ],
+        style={"width": "90%", "margin": "auto"},
+    )
+    return overview_layout
@@ -4,7 +4,6 @@
 import dash_mantine_components as dmc
 from dash import html
 import numpy as np
-import xtrack as xt
 
 
 #################### Sanity checks Layout ####################
@@ -15,6 +15,8 @@ def return_separation_layout(dic_sep_IPs):
         dmc.Center(
             dmc.Stack(
                 children=[
+                    # Inputs of the figure displayed, to update it partially when possible
+                    dcc.Store(id="store-separation-figure"),
                     dmc.Center(
                         children=[
                             dmc.Group(
@@ -15,6 +15,8 @@ def return_3D_separation_layout(dic_bb_HO):
         dmc.Center(
             dmc.Stack(
                 children=[
+                    # Inputs of the figure displayed, to update it partially when possible
+                    dcc.Store(id="store-separation-3D-figure"),
                     dmc.Center(
                         children=[
                             dmc.Group(
@@ -2,7 +2,9 @@
 
 # Import standard libraries
 import dash_mantine_components as dmc
-from dash import html, dcc
+from dash import html, dcc, dash_table
+from dash.dash_table.Format import Format, Scheme
+import pandas as pd
 
 #################### Tables Layout ####################
 
@@ -35,3 +37,101 @@ def return_tables_layout():
         style={"width": "90%", "margin": "auto"},
     )
     return layout
+
+
+#################### Download links ####################
+
+
+def return_download_links(state, name_table, collider_id=None):
+    """Return the links to download a table (see the export endpoints) in each format, for a given
+    collider (the default one if collider_id is None)."""
+    str_collider = f"&collider={collider_id}" if collider_id is not None else ""
+    return dmc.Group(
+        children=[dmc.Text("Download full table: ", size="sm")]
+        + [
+            dmc.Anchor(
+                label,
+                href=f"/export/{state}/{name_table}?format={format_export}{str_collider}",
+                size="sm",
+                color="cyan",
+            )
+            for label, format_export in zip(["CSV", "Parquet", "TFS"], ["csv", "parquet", "tfs"])
+        ],
+        position="right",
+        mt=10,
+    )
+
+
+#################### Data tables ####################
+
+
+def return_table_view(df):
+    """Return the view of a twiss or survey dataframe displayed in a data table, with the name
+    column first and the columns that can't be displayed (e.g. W_matrix) or are only used
+    internally (the element families) removed."""
+    df = df.drop(["W_matrix", "family"], axis=1, errors="ignore")
+
+    # Change order of columns such that name is first
+    return df[["name"] + [col for col in df.columns if col != "name"]]
+
+
+def return_data_table(df, id_table, server_side=False):
+    """Build a data table from a view returned by return_table_view. If server_side is True, the
+    data is not sent with the table: the pages are sorted, filtered and sent by a callback (see
+    paging.py)."""
+    if server_side:
+        dic_actions = dict(
+            data=[],
+            filter_action="custom",
+            filter_query="",
+            sort_action="custom",
+            sort_by=[],
+            page_action="custom",
+            page_current=0,
+        )
+    else:
+        dic_actions = dict(data=df.to_dict("records"), filter_action="native", sort_action="native")
+    table = (
+        dash_table.DataTable(
+            id=id_table,
+            columns=[
+                (
+                    {
+                        "name": i,
+                        "id": i,
+                        "deletable": False,
+                        "type": "numeric",
+                        "format": Format(precision=6, scheme=Scheme.decimal_or_exponent),
+                    }
+                    if pd.api.types.is_numeric_dtype(df[i])
+                    else {"name": i, "id": i, "deletable": False}
+                )
+                for i in df.columns
+            ],
+            **dic_actions,
+            editable=False,
+            sort_mode="multi",
+            row_selectable=False,
+            row_deletable=False,
+            # page_action="none",
+            # fixed_rows={"headers": True, "data": 0},
+            # fixed_columns={"headers": True, "data": 1},
+            virtualization=False,
+            page_size=25,
+            style_table={
+                # "height": "100%",
+                "maxHeight": "75vh",
+                "margin-x": "auto",
+                "margin-top": "20px",
+                "overflowY": "auto",
+                "overflowX": "auto",
+                "minWidth": "98%",
+                "padding": "1em",
+            },
+            style_header={"backgroundColor": "rgb(30, 30, 30)", "color": "white", "padding": "1em"},
+            style_data={"backgroundColor": "rgb(50, 50, 50)", "color": "white"},
+            style_filter={"backgroundColor": "rgb(70, 70, 70)"},  # , "color": "white"},
+            style_cell={"font-family": "sans-serif", "minWidth": 95},
+        ),
+    )
+    return table
@@ -0,0 +1,210 @@
+# ==================================================================================================
+# --- Imports
+# ==================================================================================================
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+
+"""This module implements the server-side paging, sorting and filtering of the data tables
+(page_action, sort_action and filter_action set to "custom"), so that only the visible page of a
+table is sent to the browser. The filter queries of the DataTable (e.g. "{betx} > 100 && {name}
+contains mq") are evaluated with vectorized masks on the stored dataframe, and the sorts use
+indexes presorted once per column.
+"""
+
+# Operators of the filter queries of the DataTable, with their optional case prefix ("i" for
+# case-insensitive, "s" for case-sensitive)
+L_OPERATORS = ["contains", "datestartswith", "eq", "ne", "lt", "le", "gt", "ge"]
+DIC_SYMBOLS = {"=": "eq", "!=": "ne", "<": "lt", "<=": "le", ">": "gt", ">=": "ge"}
+
+# Pattern of an expression of a filter query
+PATTERN_EXPRESSION = re.compile(
+    r"^\{(?P<column>[^}]+)\}\s+(?P<operator>[is]?(?:"
+    + "|".join(L_OPERATORS)
+    + r")|!=|<=|>=|=|<|>)\s+(?P<value>.+)$"
+)
+
+
+# ==================================================================================================
+# --- Functions to filter the tables
+# ==================================================================================================
+def parse_filter_query(filter_query):
+    """Return the expressions of a filter query as a list of (column, operator, value, case
+    sensitive) tuples. The expressions that can't be parsed are ignored."""
+    l_expressions = []
+    for expression in filter_query.split(" && "):
+        match_expression = PATTERN_EXPRESSION.match(expression.strip())
+        if match_expression is None:
+            continue
+        column, operator, value = match_expression.group("column", "operator", "value")
+        operator = DIC_SYMBOLS.get(operator, operator)
+        case_sensitive = not operator.startswith("i")
+        if operator[0] in "is" and operator[1:] in L_OPERATORS:
+            operator = operator[1:]
+
+        # Remove the quotes of the strings
+        value = value.strip()
+        if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'`":
+            value = value[1:-1]
+        l_expressions.append((column, operator, value, case_sensitive))
+    return l_expressions
+
+
+def _return_mask_strings(series, operator, value, case_sensitive):
+    """Return the mask of a string (or categorical) column for an operator. For categorical
+    columns, the operator is only evaluated on the categories."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        array_codes = series.cat.codes.to_numpy()
+        mask_categories = _return_mask_strings(
+            pd.Series(series.cat.categories.astype(str)), operator, value, case_sensitive
+        )
+        return np.append(mask_categories, False)[array_codes]
+
+    series = series.astype(str)
+    if not case_sensitive:
+        series = series.str.lower()
+        value = value.lower()
+    match operator:
+        case "contains":
+            return series.str.contains(value, regex=False).to_numpy()
+        case "datestartswith":
+            return series.str.startswith(value).to_numpy()
+        case "eq":
+            return (series == value).to_numpy()
+        case "ne":
+            return (series != value).to_numpy()
+        case "lt":
+            return (series < value).to_numpy()
+        case "le":
+            return (series <= value).to_numpy()
+        case "gt":
+            return (series > value).to_numpy()
+        case "ge":
+            return (series >= value).to_numpy()
+
+
+def _return_mask_numbers(array, operator, value):
+    """Return the mask of a numeric column for an operator."""
+    try:
+        value = float(value)
+    except ValueError:
+        # A non-numeric value only matches through "contains" on the formatted values
+        if operator == "contains":
+            return _return_mask_strings(pd.Series(array), operator, value, True)
+        return np.zeros(len(array), dtype=bool)
+    match operator:
+        case "contains" | "eq":
+            return array == value
+        case "ne":
+            return array != value
+        case "lt":
+            return array < value
+        case "le":
+            return array <= value
+        case "gt":
+            return array > value
+        case "ge":
+            return array >= value
+        case _:
+            return np.zeros(len(array), dtype=bool)
+
+
+def return_mask_filter(df, filter_query):
+    """Return the mask of the rows of a dataframe matching a filter query of the DataTable."""
+    mask = np.ones(len(df), dtype=bool)
+    if not filter_query:
+        return mask
+    for column, operator, value, case_sensitive in parse_filter_query(filter_query):
+        if column not in df.columns:
+            continue
+        series = df[column]
+        if pd.api.types.is_numeric_dtype(series) and not isinstance(
+            series.dtype, pd.CategoricalDtype
+        ):
+            mask &= _return_mask_numbers(series.to_numpy(), operator, value)
+        else:
+            mask &= _return_mask_strings(series, operator, value, case_sensitive)
+    return mask
+
+
+# ==================================================================================================
+# --- Paged tables
+# ==================================================================================================
+class PagedTable:
+    """Dataframe displayed in a data table with server-side paging. The order (and the ranks) of
+    the rows sorted by each column are computed once, the first time the table is sorted by this
+    column."""
+
+    def __init__(self, df):
+        self.df = df
+        self._dic_orders = {}
+        self._dic_ranks = {}
+        self._lock = threading.Lock()
+
+    def _return_keys(self, column):
+        """Return the keys used to sort the rows by a column."""
+        series = self.df[column]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            # Sort the categories once, then the codes by their sorted position
+            array_ranks = np.argsort(np.argsort(series.cat.categories.astype(str)))
+            return np.append(array_ranks, -1)[series.cat.codes.to_numpy()]
+        elif pd.api.types.is_numeric_dtype(series):
+            return series.to_numpy()
+        else:
+            return series.astype(str).to_numpy()
+
+    def return_order(self, column):
+        """Return the (stable) order of the rows sorted by a column, in ascending order."""
+        if column not in self._dic_orders:
+            with self._lock:
+                if column not in self._dic_orders:
+                    self._dic_orders[column] = np.argsort(self._return_keys(column), kind="stable")
+        return self._dic_orders[column]
+
+    def return_rank(self, column):
+        """Return the dense rank of each row when sorted by a column: equal values have the same
+        rank, so that the ties are broken by the following sorts."""
+        if column not in self._dic_ranks:
+            with self._lock:
+                if column not in self._dic_ranks:
+                    self._dic_ranks[column] = np.unique(
+                        self._return_keys(column), return_inverse=True
+                    )[1].reshape(-1)
+        return self._dic_ranks[column]
+
+    def return_indices(self, sort_by=None, filter_query=None):
+        """Return the indices of the rows matching a filter query, in the order of the sorts of
+        the DataTable (a list of {"column_id", "direction"})."""
+        mask = return_mask_filter(self.df, filter_query)
+        l_sorts = [sort for sort in sort_by or [] if sort["column_id"] in self.df.columns]
+        if len(l_sorts) == 0:
+            return np.flatnonzero(mask)
+
+        # A single sort uses the presorted order directly
+        if len(l_sorts) == 1:
+            order = self.return_order(l_sorts[0]["column_id"])
+            if l_sorts[0]["direction"] == "desc":
+                order = order[::-1]
+            return order[mask[order]]
+
+        # Several sorts are combined from the ranks of each column (the first sort has priority)
+        l_keys = [
+            (
+                -self.return_rank(sort["column_id"])
+                if sort["direction"] == "desc"
+                else self.return_rank(sort["column_id"])
+            )
+            for sort in reversed(l_sorts)
+        ]
+        order = np.lexsort(l_keys)
+        return order[mask[order]]
+
+    def return_page(self, page_current, page_size, sort_by=None, filter_query=None):
+        """Return the records of the requested page and the number of pages."""
+        indices = self.return_indices(sort_by, filter_query)
+        page_count = max(1, -(-len(indices) // page_size))
+        page_current = min(page_current or 0, page_count - 1)
+        indices_page = indices[page_current * page_size : (page_current + 1) * page_size]
+        return self.df.iloc[indices_page].to_dict("records"), page_count
@@ -2,11 +2,39 @@
 # --- Imports
 # ==================================================================================================import numpy as np
 import numpy as np
-import seaborn as sns
+import plotly.colors
 import plotly.graph_objects as go
 import plotly.express as px
 from plotly.subplots import make_subplots
 
+# Import the tune resolution of the frequency map analysis
+import tracking
+
+# Spectral palette of 10 colors (as given by seaborn.color_palette("Spectral", 10)), stored as a
+# constant to avoid importing seaborn
+L_PALETTE_SPECTRAL = [
+    "#d0384e",
+    "#ee6445",
+    "#fa9b58",
+    "#fece7c",
+    "#fff1a8",
+    "#f4faad",
+    "#d1ed9c",
+    "#97d5a4",
+    "#5cb7aa",
+    "#3682ba",
+]
+
+
+def return_palette_spectral(n_colors):
+    """Return n_colors colors sampled from the Spectral colorscale, leaving out the extremes (as
+    seaborn does)."""
+    if n_colors == len(L_PALETTE_SPECTRAL):
+        return L_PALETTE_SPECTRAL
+    return plotly.colors.sample_colorscale(
+        px.colors.diverging.Spectral, list(np.linspace(0, 1, n_colors + 2)[1:-1])
+    )
+
 
 # ==================================================================================================
 # --- Plotting functions
@@ -51,6 +79,24 @@ def return_beam_pipe_trace(df_sv):
     )
 
 
+def return_multipole_strengths(df_elements, order):
+    """Return the strengths of all the multipoles of a given order."""
+    df_elements = df_elements[df_elements._order == order]
+
+    # The knl arrays are split into numeric columns in the artifacts
+    if f"knl_{order}" in df_elements.columns:
+        return df_elements[f"knl_{order}"]
+
+    # Function to filter magnet strength
+    def return_correct_strength(x):
+        try:
+            return x[order]
+        except:
+            return float(x)
+
+    return df_elements["knl"].apply(return_correct_strength)
+
+
 def return_multipole_trace(
     df_elements,
     df_sv,
@@ -108,15 +154,8 @@ def return_circular_multipole_trace(
         name = "Octupoles"
         strength_magnification_factor = strength_magnification_factor / 20
 
-    # Function to filter magnet strength
-    def return_correct_strength(x):
-        try:
-            return x[order]
-        except:
-            return float(x)
-
     # Get strength of all multipoles of the requested order
-    s_knl = df_elements[df_elements._order == order]["knl"].apply(return_correct_strength)
+    s_knl = return_multipole_strengths(df_elements, order)
 
     # Remove zero-strength dipoles and magnify
     s_knl = s_knl[s_knl != 0] * strength_magnification_factor
@@ -206,15 +245,8 @@ def return_flat_multipole_trace(
         name = "Octupoles"
         strength_magnification_factor = strength_magnification_factor / 4
 
-    # Function to filter magnet strength
-    def return_correct_strength(x):
-        try:
-            return x[order]
-        except:
-            return float(x)
-
     # Get strength of all multipoles of the requested order
-    s_knl = df_elements[df_elements._order == order]["knl"].apply(return_correct_strength)
+    s_knl = return_multipole_strengths(df_elements, order)
 
     # Remove zero-strength dipoles and magnify
     s_knl = s_knl[s_knl != 0] * strength_magnification_factor
@@ -1349,9 +1381,17 @@ def return_plot_separation_3D(dic_bb_ho_IPs):
     return fig
 
 
-def return_plot_footprint(t_array_footprint, title):
-    palette = sns.color_palette("Spectral", 10).as_hex()
+def return_plot_footprint(t_array_footprint, title, render_mode="auto", max_points_scatter=2000):
+    """Plot a footprint, either as a scatter plot of all the points, or as a density heatmap
+    binned server-side (render_mode "scatter" or "heatmap"). In "auto" mode, the heatmap is used
+    as soon as the footprint has more than max_points_scatter points."""
     array_qx, array_qy = t_array_footprint
+    if render_mode == "auto":
+        render_mode = "heatmap" if np.size(array_qx) > max_points_scatter else "scatter"
+    if render_mode == "heatmap" or np.size(array_qx) == 0:
+        return return_plot_footprint_heatmap(t_array_footprint, title)
+
+    palette = L_PALETTE_SPECTRAL
     fig = go.Figure()
     # for x, y in zip(array_qx, array_qy):
     #     # Insert additional None when dx or dy is too big
@@ -1411,3 +1451,382 @@ def return_plot_footprint(t_array_footprint, title):
     )
 
     return fig
+
+
+def return_plot_footprint_decomposition(dic_footprint_decomposition, title):
+    palette = return_palette_spectral(len(dic_footprint_decomposition))
+    fig = go.Figure()
+    for idx, (contribution, (array_qx, array_qy)) in enumerate(
+        dic_footprint_decomposition.items()
+    ):
+        fig.add_trace(
+            go.Scattergl(
+                x=np.ravel(array_qx),
+                y=np.ravel(array_qy),
+                mode="markers",
+                marker=dict(color=palette[idx], size=4),
+                opacity=0.7,
+                name=contribution,
+                # Only the full footprint is displayed initially
+                visible=True if idx == 0 else "legendonly",
+            ),
+        )
+
+    # Set the range from the footprint with all beam-beam contributions
+    array_qx, array_qy = list(dic_footprint_decomposition.values())[0]
+
+    fig.update_yaxes(
+        scaleanchor="x",
+        scaleratio=1,
+    )
+
+    fig.update_layout(
+        title=title,
+        title_x=0.5,
+        xaxis_title="Qx",
+        yaxis_title="Qy",
+        xaxis=dict(
+            range=[np.min(array_qx) - 0.001, np.max(array_qx) + 0.001],
+        ),
+        yaxis=dict(
+            range=[np.min(array_qy) - 0.001, np.max(array_qy) + 0.001],
+        ),
+        showlegend=True,
+        legend_x=1,
+        legend_y=0.5,
+        margin=dict(l=20, r=20, b=10, t=30, pad=10),
+        template="plotly_dark",
+        paper_bgcolor="rgba(0,0,0,0)",
+        plot_bgcolor="rgba(0,0,0,0)",
+        dragmode="pan",
+    )
+
+    return fig
+
+
+def return_plot_footprint_multibunch(dic_multibunch_b1, dic_multibunch_b2):
+    fig = make_subplots(rows=2, cols=1, shared_xaxes=True)
+
+    for dic_multibunch, name, color in zip(
+        [dic_multibunch_b1, dic_multibunch_b2], ["Beam 1", "Beam 2"], ["cyan", "tomato"]
+    ):
+        # The bunches whose family is approximate (see tracking.return_bunch_families) are
+        # displayed with open markers
+        array_approximate = np.asarray(
+            dic_multibunch.get("approximate", np.zeros(len(dic_multibunch["slots"]), dtype=bool))
+        )
+        customdata = np.stack(
+            [
+                np.asarray(dic_multibunch["family"]).astype(str),
+                np.where(array_approximate, " (approximate)", ""),
+            ],
+            axis=-1,
+        )
+        for row, spread in zip([1, 2], ["qx_spread", "qy_spread"]):
+            fig.append_trace(
+                go.Scattergl(
+                    x=dic_multibunch["slots"],
+                    y=dic_multibunch[spread],
+                    customdata=customdata,
+                    mode="markers",
+                    marker=dict(
+                        color=color,
+                        size=5,
+                        symbol=np.where(array_approximate, "circle-open", "circle"),
+                    ),
+                    name=name,
+                    legendgroup=name,
+                    showlegend=row == 1,
+                    hovertemplate="Slot: %{x}<br>Spread: %{y:.2e}<br>Family: %{customdata[0]}"
+                    + "%{customdata[1]}<extra></extra>",
+                ),
+                row=row,
+                col=1,
+            )
+
+    fig.update_yaxes(title_text=r"$\Delta Q_x$", row=1, col=1)
+    fig.update_yaxes(title_text=r"$\Delta Q_y$", row=2, col=1)
+    fig.update_xaxes(title_text=r"25ns slot", row=2, col=1)
+
+    fig.update_layout(
+        title="Tune spread of each bunch, from the footprint of its family (open if approximate)",
+        title_x=0.5,
+        showlegend=True,
+        dragmode="pan",
+        margin=dict(l=20, r=20, b=10, t=30, pad=10),
+        template="plotly_dark",
+        paper_bgcolor="rgba(0,0,0,0)",
+        plot_bgcolor="rgba(0,0,0,0)",
+        legend_x=1,
+        legend_y=0.5,
+    )
+
+    return fig
+
+
+def return_plot_fma(dic_fma, title):
+    fig = make_subplots(
+        rows=1,
+        cols=2,
+        subplot_titles=("Tune diagram", "Initial amplitudes"),
+        horizontal_spacing=0.1,
+    )
+
+    # Color all particles with their tune diffusion
+    marker = dict(
+        color=dic_fma["diffusion"],
+        colorscale="Spectral_r",
+        cmin=np.log10(tracking.RESOLUTION_TUNE),
+        cmax=-2,
+        size=6,
+        colorbar=dict(title=r"log10(ΔQ)"),
+    )
+    fig.add_trace(
+        go.Scattergl(
+            x=dic_fma["qx"],
+            y=dic_fma["qy"],
+            mode="markers",
+            marker=marker,
+            hovertemplate="Qx: %{x:.5f}<br>Qy: %{y:.5f}<br>log10(ΔQ): %{marker.color:.2f}"
+            + "<extra></extra>",
+        ),
+        row=1,
+        col=1,
+    )
+    fig.add_trace(
+        go.Scattergl(
+            x=dic_fma["x_norm"],
+            y=dic_fma["y_norm"],
+            mode="markers",
+            marker={**marker, "showscale": False},
+            hovertemplate="x: %{x:.2f}σ<br>y: %{y:.2f}σ<br>log10(ΔQ): %{marker.color:.2f}"
+            + "<extra></extra>",
+        ),
+        row=1,
+        col=2,
+    )
+
+    fig.update_xaxes(title_text="Qx", row=1, col=1)
+    fig.update_yaxes(title_text="Qy", row=1, col=1)
+    fig.update_xaxes(title_text=r"$x [\sigma]$", row=1, col=2)
+    fig.update_yaxes(title_text=r"$y [\sigma]$", row=1, col=2)
+
+    fig.update_layout(
+        title=title,
+        title_x=0.5,
+        showlegend=False,
+        dragmode="pan",
+        margin=dict(l=20, r=20, b=10, t=60, pad=10),
+        template="plotly_dark",
+        paper_bgcolor="rgba(0,0,0,0)",
+        plot_bgcolor="rgba(0,0,0,0)",
+    )
+
+    return fig
+
+
+def return_plot_da(array_da_b1, array_da_b2):
+    fig = go.Figure()
+    for array_da, name, color in zip(
+        [array_da_b1, array_da_b2], ["Beam 1", "Beam 2"], ["cyan", "tomato"]
+    ):
+        # The angles out of the range of amplitudes scanned (see tracking.return_da) are flagged
+        array_flags = array_da[:, 2] if array_da.shape[1] > 2 else np.zeros(len(array_da))
+        fig.add_trace(
+            go.Scatter(
+                x=np.degrees(array_da[:, 0]),
+                y=array_da[:, 1],
+                customdata=np.select(
+                    [
+                        array_flags == tracking.FLAG_DA_STABLE,
+                        array_flags == tracking.FLAG_DA_UNSTABLE,
+                    ],
+                    [" (stable up to the largest amplitude)", " (unstable from the smallest one)"],
+                    "",
+                ),
+                mode="lines+markers",
+                line=dict(color=color, width=2),
+                marker=dict(
+                    size=8,
+                    symbol=np.select(
+                        [
+                            array_flags == tracking.FLAG_DA_STABLE,
+                            array_flags == tracking.FLAG_DA_UNSTABLE,
+                        ],
+                        ["triangle-up", "triangle-down"],
+                        "circle",
+                    ),
+                ),
+                name=name,
+                hovertemplate="Angle: %{x:.1f}°<br>DA: %{y:.2f}σ%{customdata}<extra></extra>",
+            )
+        )
+
+    fig.update_xaxes(title_text=r"$\textrm{Angle in the (x, y) plane }[°]$", range=[0, 90])
+    fig.update_yaxes(title_text=r"$\textrm{DA }[\sigma]$", rangemode="tozero")
+
+    fig.update_layout(
+        title="Quick dynamic aperture estimate (with beam-beam, triangles if out of range)",
+        title_x=0.5,
+        showlegend=True,
+        dragmode="pan",
+        margin=dict(l=20, r=20, b=10, t=30, pad=10),
+        template="plotly_dark",
+        paper_bgcolor="rgba(0,0,0,0)",
+        plot_bgcolor="rgba(0,0,0,0)",
+        legend_x=1,
+        legend_y=0.5,
+    )
+
+    return fig
+
+
+def return_plot_summary_heatmap(df_summary, column_x, column_y, column_z):
+    """Return a heatmap of a summary column as a function of two others (e.g. scan parameters),
+    averaging the colliders falling on the same point."""
+    fig = go.Figure()
+    if len({column_x, column_y}) == 2 and {column_x, column_y, column_z} <= set(df_summary.columns):
+        df_pivot = df_summary.pivot_table(
+            index=column_y, columns=column_x, values=column_z, aggfunc="mean"
+        )
+        fig.add_trace(
+            go.Heatmap(
+                z=df_pivot.to_numpy(),
+                x=df_pivot.columns,
+                y=df_pivot.index,
+                colorscale="Viridis",
+                colorbar=dict(title=column_z),
+                hovertemplate=(
+                    f"{column_x}: %{{x}}<br>{column_y}: %{{y}}<br>{column_z}: %{{z}}"
+                    + "<extra></extra>"
+                ),
+            )
+        )
+
+    fig.update_xaxes(title_text=column_x)
+    fig.update_yaxes(title_text=column_y)
+
+    fig.update_layout(
+        title=f"{column_z} across the scan",
+        title_x=0.5,
+        dragmode="pan",
+        margin=dict(l=20, r=20, b=10, t=30, pad=10),
+        template="plotly_dark",
+        paper_bgcolor="rgba(0,0,0,0)",
+        plot_bgcolor="rgba(0,0,0,0)",
+    )
+
+    return fig
+
+
+def return_footprint_edge(array_qx, array_qy, n_points_max=200):
+    """Return the outer edge of a footprint, downsampled to at most n_points_max points. The
+    footprint arrays have shape (n_theta, n_r), as returned by xtrack."""
+    if np.ndim(array_qx) != 2:
+        qx_edge = np.ravel(array_qx)
+        qy_edge = np.ravel(array_qy)
+    else:
+        # Follow the smallest angle outwards, the largest amplitude, and the largest angle back
+        qx_edge = np.concatenate([array_qx[0, :], array_qx[:, -1], array_qx[-1, ::-1]])
+        qy_edge = np.concatenate([array_qy[0, :], array_qy[:, -1], array_qy[-1, ::-1]])
+
+    if len(qx_edge) > n_points_max:
+        idx = np.linspace(0, len(qx_edge) - 1, n_points_max).astype(int)
+        qx_edge = qx_edge[idx]
+        qy_edge = qy_edge[idx]
+
+    return qx_edge, qy_edge
+
+
+def return_plot_footprint_empty(title):
+    """Return an empty footprint figure, annotated as having no (finite) tunes."""
+    fig = go.Figure()
+    fig.add_annotation(
+        text="No finite tunes in this footprint",
+        x=0.5,
+        y=0.5,
+        xref="paper",
+        yref="paper",
+        showarrow=False,
+    )
+    fig.update_layout(
+        title=title,
+        title_x=0.5,
+        xaxis_title="Qx",
+        yaxis_title="Qy",
+        showlegend=False,
+        margin=dict(l=20, r=20, b=10, t=30, pad=10),
+        template="plotly_dark",
+        paper_bgcolor="rgba(0,0,0,0)",
+        plot_bgcolor="rgba(0,0,0,0)",
+    )
+    return fig
+
+
+def return_plot_footprint_heatmap(t_array_footprint, title, n_bins=100, n_points_edge=200):
+    array_qx, array_qy = t_array_footprint
+    qx = np.ravel(array_qx)
+    qy = np.ravel(array_qy)
+    mask = np.isfinite(qx) & np.isfinite(qy)
+    qx = qx[mask]
+    qy = qy[mask]
+
+    # An empty (or all-NaN) footprint can't be binned
+    if qx.size == 0:
+        return return_plot_footprint_empty(title)
+
+    # Bin the footprint server-side, so that the figure size doesn't depend on its resolution
+    range_qx = [np.min(qx) - 0.001, np.max(qx) + 0.001]
+    range_qy = [np.min(qy) - 0.001, np.max(qy) + 0.001]
+    counts, edges_qx, edges_qy = np.histogram2d(qx, qy, bins=n_bins, range=[range_qx, range_qy])
+
+    # Empty bins are transparent, and counts are displayed in log scale
+    with np.errstate(divide="ignore"):
+        z = np.where(counts > 0, np.log10(counts), np.nan).T
+
+    fig = go.Figure()
+    fig.add_trace(
+        go.Heatmap(
+            x=(edges_qx[:-1] + edges_qx[1:]) / 2,
+            y=(edges_qy[:-1] + edges_qy[1:]) / 2,
+            z=z,
+            colorscale="Spectral_r",
+            showscale=False,
+            hovertemplate="Qx: %{x:.5f}<br>Qy: %{y:.5f}<br>log10(count): %{z:.2f}"
+            + "<extra></extra>",
+        )
+    )
+
+    # Overlay the outer edge of the footprint
+    qx_edge, qy_edge = return_footprint_edge(array_qx, array_qy, n_points_max=n_points_edge)
+    fig.add_trace(
+        go.Scattergl(
+            x=qx_edge,
+            y=qy_edge,
+            mode="markers",
+            marker=dict(color="whitesmoke", size=3),
+            hoverinfo="skip",
+        )
+    )
+
+    fig.update_yaxes(
+        scaleanchor="x",
+        scaleratio=1,
+    )
+
+    fig.update_layout(
+        title=title,
+        title_x=0.5,
+        xaxis_title="Qx",
+        yaxis_title="Qy",
+        xaxis=dict(range=range_qx),
+        yaxis=dict(range=range_qy),
+        showlegend=False,
+        margin=dict(l=20, r=20, b=10, t=30, pad=10),
+        template="plotly_dark",
+        paper_bgcolor="rgba(0,0,0,0)",
+        plot_bgcolor="rgba(0,0,0,0)",
+        dragmode="pan",
+    )
+
+    return fig
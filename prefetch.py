@@ -0,0 +1,124 @@
+# ==================================================================================================
+# --- Imports
+# ==================================================================================================
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Import functions to load the artifacts and the cache of colliders
+import artifacts
+import store
+
+"""This module prefetches, in background threads, the colliders that are likely to be displayed
+next: the neighbours of the current collider in the dropdown (e.g. the next points of a scan), and
+the colliders recently displayed. They are loaded in the cache of store.py, so that switching to
+them doesn't block the callbacks. The number of concurrent prefetches is bounded, and the
+prefetches are cancelled when the memory gets short (little memory available on the machine, or
+cache of colliders full).
+"""
+
+# Number of colliders prefetched at the same time
+N_WORKERS_PREFETCH = int(os.environ.get("SIMBOARD_PREFETCH_WORKERS", 2))
+
+# Number of neighbours prefetched on each side of the current collider
+N_NEIGHBOURS = 2
+
+# Number of recently displayed colliders prefetched
+N_RECENT = 2
+
+# Memory (in bytes) that must remain available on the machine for the prefetches to go on
+SIZE_MIN_AVAILABLE = int(os.environ.get("SIMBOARD_PREFETCH_MIN_AVAILABLE", 2 * 1024**3))
+
+# Pool of threads running the prefetches
+_executor = ThreadPoolExecutor(max_workers=N_WORKERS_PREFETCH, thread_name_prefix="prefetch")
+
+# Prefetches submitted and not done yet, by artifact path
+_lock = threading.Lock()
+_dic_futures = {}
+
+
+# ==================================================================================================
+# --- Functions to monitor the memory
+# ==================================================================================================
+def return_memory_available():
+    """Return the memory available on the machine (in bytes), from /proc/meminfo, or None if it
+    can't be read."""
+    try:
+        with open("/proc/meminfo", "r") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def is_memory_short():
+    """Return True if the prefetches should stop, i.e. if the memory available on the machine is
+    below SIZE_MIN_AVAILABLE or if the cache of colliders is full."""
+    memory_available = return_memory_available()
+    if memory_available is not None and memory_available < SIZE_MIN_AVAILABLE:
+        return True
+    return store.return_cache_nbytes() >= store.SIZE_CACHE_MAX
+
+
+# ==================================================================================================
+# --- Functions to prefetch the colliders
+# ==================================================================================================
+def _prefetch_collider(path_artifact):
+    """Load a collider and all its variables in the cache, stopping if the memory gets short."""
+    try:
+        if is_memory_short():
+            return
+        collider = store.return_collider(path_artifact, prefetch=True)
+        for dic in [collider.dic_without_bb, collider.dic_with_bb]:
+            if not isinstance(dic, artifacts.LazyArtifactDict):
+                continue
+            for key in dic:
+                if is_memory_short():
+                    print(f"Prefetch of {store.return_collider_id(path_artifact)} cancelled.")
+                    return
+                dic[key]
+    except Exception as e:
+        print(f"Could not prefetch {path_artifact}: {e}")
+    finally:
+        with _lock:
+            _dic_futures.pop(path_artifact, None)
+
+
+def return_l_paths_to_prefetch(path_artifact, l_paths_ordered):
+    """Return the artifact paths of the colliders to prefetch when path_artifact is displayed, by
+    priority: the neighbours in l_paths_ordered (the order of the dropdown), then the colliders
+    recently displayed."""
+    l_paths = []
+    if path_artifact in l_paths_ordered:
+        idx = l_paths_ordered.index(path_artifact)
+        for offset in range(1, N_NEIGHBOURS + 1):
+            for idx_neighbour in [idx + offset, idx - offset]:
+                if 0 <= idx_neighbour < len(l_paths_ordered):
+                    l_paths.append(l_paths_ordered[idx_neighbour])
+    l_paths.extend(
+        [path for path in store.return_l_paths_recent() if path != path_artifact][:N_RECENT]
+    )
+
+    # Remove duplicates and the colliders already in the cache
+    return [
+        path
+        for idx, path in enumerate(l_paths)
+        if path not in l_paths[:idx] and not store.is_collider_cached(path)
+    ]
+
+
+def prefetch_colliders(path_artifact, l_paths_ordered):
+    """Prefetch, in the background, the colliders likely to be displayed after path_artifact. The
+    prefetches still waiting for a thread and no longer relevant are cancelled."""
+    l_paths = return_l_paths_to_prefetch(path_artifact, l_paths_ordered)
+    with _lock:
+        for path, future in list(_dic_futures.items()):
+            if path not in l_paths and future.cancel():
+                del _dic_futures[path]
+        if is_memory_short():
+            return
+        for path in l_paths:
+            if path not in _dic_futures:
+                _dic_futures[path] = _executor.submit(_prefetch_collider, path)
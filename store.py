@@ -0,0 +1,221 @@
+# ==================================================================================================
+# --- Imports
+# ==================================================================================================
+import logging
+import os
+import threading
+from collections import OrderedDict, deque
+
+# Import functions to load the artifacts
+import artifacts
+
+"""This module holds the colliders loaded by the dashboard, in a cache shared by all the requests
+(and threads) of a worker. Each request resolves the collider it displays from its URL
+(/collider/<id>, where id is the name of the artifact directory), so that several users can browse
+different colliders at the same time. The cache is a LRU cache with a memory budget per worker (in
+bytes, set by the environment variable SIMBOARD_CACHE_BYTES), measured from the size of the arrays
+loaded for each collider: the least recently used colliders are evicted when the budget is
+exceeded, except for the default one. By default, a total of 4 GB is split between the workers
+(SIMBOARD_WORKERS, set by gunicorn.conf.py).
+"""
+
+# Prefix of the URLs of the colliders
+PREFIX_URL_COLLIDER = "/collider/"
+
+# Lock protecting the cache
+_lock = threading.Lock()
+
+# Cache of the loaded colliders, by artifact path, from the least to the most recently used
+_dic_colliders = OrderedDict()
+
+# Number of workers serving the dashboard, each holding its own cache
+N_WORKERS = int(os.environ.get("SIMBOARD_WORKERS", 1))
+
+# Memory budget of the cache of each worker, in bytes
+SIZE_CACHE_MAX = int(os.environ.get("SIMBOARD_CACHE_BYTES", 4 * 1024**3 // N_WORKERS))
+
+# Statistics of the cache
+_dic_stats = {"hits": 0, "misses": 0, "evictions": 0, "prefetches": 0}
+
+# Artifact paths of the colliders recently displayed, from the least to the most recent
+N_RECENT = 8
+_deque_recent = deque(maxlen=N_RECENT)
+
+# Artifact path of the collider displayed when none is requested
+path_artifact_default = None
+
+
+class LoadedCollider:
+    """Variables of a collider (before and after beam-beam) and the associated paths."""
+
+    def __init__(self, path_artifact, dic_without_bb, dic_with_bb, path_job):
+        self.path_artifact = path_artifact
+        self.dic_without_bb = dic_without_bb
+        self.dic_with_bb = dic_with_bb
+        self.path_job = path_job
+
+    def return_dic(self, state):
+        """Return the variables for a given beam-beam state ("with_bb" or "without_bb")."""
+        return self.dic_with_bb if state == "with_bb" else self.dic_without_bb
+
+    def return_nbytes(self):
+        """Return the size (in bytes) of the variables loaded so far."""
+        return artifacts.return_nbytes(self.dic_without_bb) + artifacts.return_nbytes(
+            self.dic_with_bb
+        )
+
+
+# ==================================================================================================
+# --- Functions to resolve the colliders
+# ==================================================================================================
+def return_collider_id(path_artifact):
+    """Return the id of a collider (used in the URLs) from its artifact path."""
+    return os.path.basename(os.path.normpath(path_artifact))
+
+
+def return_url_collider(path_artifact):
+    """Return the URL (path) of a collider."""
+    return PREFIX_URL_COLLIDER + return_collider_id(path_artifact)
+
+
+def return_path_artifact_from_id(collider_id):
+    """Return the artifact path of a collider id, or the default artifact path if the id is None
+    or doesn't correspond to an artifact."""
+    if collider_id is None or "/" in collider_id or collider_id.startswith("."):
+        return path_artifact_default
+    path_artifact = os.path.join(artifacts.PATH_ARTIFACTS, collider_id)
+    if not artifacts.artifact_exists(path_artifact):
+        return path_artifact_default
+    return path_artifact
+
+
+def return_path_artifact_from_pathname(pathname):
+    """Return the artifact path of the collider requested in the path of a URL."""
+    if pathname is None or not pathname.startswith(PREFIX_URL_COLLIDER):
+        return path_artifact_default
+    return return_path_artifact_from_id(pathname[len(PREFIX_URL_COLLIDER) :].strip("/"))
+
+
+# ==================================================================================================
+# --- Functions to load the colliders
+# ==================================================================================================
+def _return_path_job(path_artifact):
+    """Return the path of the job of a collider, from the metadata of its artifact."""
+    try:
+        dic_metadata = artifacts.load_artifact_metadata(path_artifact)
+    except (OSError, ValueError):
+        return ""
+    path_source = dic_metadata.get("path_config") or dic_metadata.get("path_collider") or ""
+    return os.path.dirname(path_source)
+
+
+def set_default_collider(path_artifact, dic_without_bb, dic_with_bb, path_job):
+    """Register an already loaded collider, and display it when no collider is requested."""
+    global path_artifact_default
+    with _lock:
+        _dic_colliders[path_artifact] = LoadedCollider(
+            path_artifact, dic_without_bb, dic_with_bb, path_job
+        )
+        path_artifact_default = path_artifact
+
+
+def set_cache_budget(size_max):
+    """Set the memory budget of the cache (in bytes), evicting colliders if needed."""
+    global SIZE_CACHE_MAX
+    with _lock:
+        SIZE_CACHE_MAX = size_max
+        _evict_colliders()
+
+
+def _evict_colliders(path_artifact_kept=None):
+    """Evict the least recently used colliders until the cache fits in its memory budget. The
+    default collider and the collider path_artifact_kept are never evicted. Must be called with
+    the lock acquired."""
+    dic_nbytes = {path: collider.return_nbytes() for path, collider in _dic_colliders.items()}
+    nbytes = sum(dic_nbytes.values())
+    for path in list(_dic_colliders):
+        if nbytes <= SIZE_CACHE_MAX:
+            break
+        if path in [path_artifact_default, path_artifact_kept]:
+            continue
+        del _dic_colliders[path]
+        nbytes -= dic_nbytes[path]
+        _dic_stats["evictions"] += 1
+        logging.info(f"Collider {return_collider_id(path)} evicted from the cache.")
+
+
+def return_collider(path_artifact, prefetch=False):
+    """Return a collider from the cache, loading it from its artifact if needed. If prefetch is
+    True, the collider is loaded without being marked as displayed (it isn't added to the recently
+    displayed colliders, and doesn't count in the hits and misses). It is still added as the most
+    recently used collider, so that it's not evicted while its variables are being prefetched."""
+    with _lock:
+        collider = _dic_colliders.get(path_artifact)
+        if collider is not None:
+            if prefetch:
+                return collider
+            _dic_colliders.move_to_end(path_artifact)
+            _mark_as_recent(path_artifact)
+            _dic_stats["hits"] += 1
+            # The collider may have grown since the last access (variables are loaded lazily)
+            _evict_colliders(path_artifact)
+            return collider
+        _dic_stats["prefetches" if prefetch else "misses"] += 1
+
+    # Load outside of the lock, so that the other requests are not blocked
+    dic_without_bb, dic_with_bb = artifacts.load_artifact(path_artifact)
+    collider = LoadedCollider(
+        path_artifact, dic_without_bb, dic_with_bb, _return_path_job(path_artifact)
+    )
+
+    with _lock:
+        # Another request may have loaded the same collider in the meantime
+        collider = _dic_colliders.setdefault(path_artifact, collider)
+        _dic_colliders.move_to_end(path_artifact)
+        if not prefetch:
+            _mark_as_recent(path_artifact)
+        _evict_colliders(path_artifact)
+        return collider
+
+
+def _mark_as_recent(path_artifact):
+    """Move a collider to the end of the recently displayed colliders. Must be called with the
+    lock acquired."""
+    if path_artifact in _deque_recent:
+        _deque_recent.remove(path_artifact)
+    _deque_recent.append(path_artifact)
+
+
+def is_collider_cached(path_artifact):
+    """Return True if a collider is in the cache."""
+    with _lock:
+        return path_artifact in _dic_colliders
+
+
+def return_l_paths_recent():
+    """Return the artifact paths of the colliders recently displayed, the most recent first."""
+    with _lock:
+        return list(reversed(_deque_recent))
+
+
+def return_cache_nbytes():
+    """Return the size (in bytes) of the colliders in the cache."""
+    with _lock:
+        return sum(collider.return_nbytes() for collider in _dic_colliders.values())
+
+
+def return_collider_from_pathname(pathname):
+    """Return the collider requested in the path of a URL (the default one otherwise)."""
+    return return_collider(return_path_artifact_from_pathname(pathname))
+
+
+def return_cache_stats():
+    """Return the statistics of the cache: hits, misses, evictions, prefetches, number of
+    colliders, size and memory budget (in bytes)."""
+    with _lock:
+        return {
+            **_dic_stats,
+            "n_colliders": len(_dic_colliders),
+            "nbytes": sum(collider.return_nbytes() for collider in _dic_colliders.values()),
+            "nbytes_max": SIZE_CACHE_MAX,
+        }
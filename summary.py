@@ -0,0 +1,144 @@
+# ==================================================================================================
+# --- Imports
+# ==================================================================================================
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+# Import functions to handle the artifacts (paths and locks)
+import artifacts
+
+"""This module maintains a small columnar summary index of all the precomputed colliders: one row
+of scalars (tunes, chromaticities, luminosities, crossing parameters, footprint spread, etc.) per
+artifact, stored as a single .npz file next to the artifacts. It can be loaded without touching
+the artifacts themselves, to compare the colliders of a scan.
+"""
+
+# Path of the summary index
+PATH_SUMMARY = os.path.join(artifacts.PATH_ARTIFACTS, "summary.npz")
+
+# Knobs stored in the summary (when they exist in the collider), often used as scan parameters
+L_KNOBS_SUMMARY = [
+    "on_x1",
+    "on_x2h",
+    "on_x2v",
+    "on_x5",
+    "on_x8h",
+    "on_x8v",
+    "on_sep1",
+    "on_sep2",
+    "on_sep5",
+    "on_sep8",
+    "i_oct_b1",
+    "i_oct_b2",
+]
+
+# Columns identifying the colliders (the others are numeric)
+L_COLUMNS_ID = ["path_artifact", "label"]
+
+
+# ==================================================================================================
+# --- Functions to build the summary
+# ==================================================================================================
+def return_knobs_summary(collider):
+    """Return the value of the knobs of L_KNOBS_SUMMARY in a given collider (NaN if missing)."""
+    dic_knobs = {}
+    for knob in L_KNOBS_SUMMARY:
+        try:
+            dic_knobs[knob] = float(collider.varval[knob])
+        except (KeyError, AttributeError):
+            dic_knobs[knob] = np.nan
+    return dic_knobs
+
+
+def return_summary_row(dic_with_bb, dic_knobs=None):
+    """Return the scalars summarizing a collider, from its variables after beam-beam."""
+    dic_row = {}
+
+    # Tunes, chromaticities and coupling
+    for beam in ["b1", "b2"]:
+        dic_tw = dic_with_bb["dic_tw_" + beam]
+        for observable in ["qx", "qy", "dqx", "dqy", "c_minus"]:
+            dic_row[f"{observable}_{beam}"] = float(dic_tw[observable])
+
+    # Crossing parameters at the IPs (beam 1)
+    for ip in [1, 2, 5, 8]:
+        _, x, px, y, py, betx, bety = dic_with_bb["dic_tw_b1"][f"ip{ip}"]
+        dic_row[f"betx_ip{ip}"] = float(betx)
+        dic_row[f"bety_ip{ip}"] = float(bety)
+        dic_row[f"px_ip{ip}"] = float(px) * 1e6
+        dic_row[f"py_ip{ip}"] = float(py) * 1e6
+        dic_row[f"x_ip{ip}"] = float(x) * 1e3
+        dic_row[f"y_ip{ip}"] = float(y) * 1e3
+        for plane in ["h", "v"]:
+            dic_sep = dic_with_bb["dic_sep_IPs"][plane][f"ip{ip}"]
+            dic_row[f"sep_{plane}_ip{ip}"] = float(dic_sep["sep"])
+
+    # Luminosities and polarities
+    l_lumi = dic_with_bb["l_lumi"]
+    for idx, ip in enumerate([1, 2, 5, 8]):
+        dic_row[f"lumi_ip{ip}"] = float(l_lumi[idx]) if l_lumi is not None else np.nan
+    for polarity in ["polarity_alice", "polarity_lhcb"]:
+        try:
+            dic_row[polarity] = float(dic_with_bb[polarity])
+        except (TypeError, ValueError):
+            dic_row[polarity] = np.nan
+
+    # Footprint spread
+    for beam in ["b1", "b2"]:
+        array_qx, array_qy = dic_with_bb["footprint_" + beam]
+        for plane, array_q in zip(["qx", "qy"], [array_qx, array_qy]):
+            dic_row[f"footprint_{plane}_spread_{beam}"] = (
+                float(np.ptp(array_q)) if np.size(array_q) > 0 else np.nan
+            )
+
+    # Knobs
+    if dic_knobs is not None:
+        dic_row.update(dic_knobs)
+
+    return dic_row
+
+
+# ==================================================================================================
+# --- Functions to store and load the summary
+# ==================================================================================================
+def load_summary(path_summary=PATH_SUMMARY):
+    """Return the summary index as a dataframe (one row per artifact), empty if it doesn't
+    exist."""
+    if not os.path.isfile(path_summary):
+        return pd.DataFrame(columns=L_COLUMNS_ID)
+    with np.load(path_summary, allow_pickle=False) as npz:
+        return pd.DataFrame({column: npz[column] for column in npz.files})
+
+
+def append_to_summary(path_artifact, label, dic_row, path_summary=PATH_SUMMARY):
+    """Add (or replace) the row of an artifact in the summary index. The summary is rewritten
+    atomically, under a lock."""
+    with artifacts.artifact_lock(os.path.splitext(path_summary)[0]):
+        df_summary = load_summary(path_summary)
+
+        # Replace any previous row of the same artifact
+        dic_id = {"path_artifact": path_artifact, "label": label if label is not None else ""}
+        df_row = pd.DataFrame([dic_id | dic_row])
+        df_summary = df_summary[df_summary["path_artifact"] != path_artifact]
+        df_summary = pd.concat([df_summary, df_row], ignore_index=True)
+
+        # Identifiers are stored as strings, everything else as floats
+        dic_columns = {
+            column: (
+                df_summary[column].astype(str).to_numpy(dtype=str)
+                if column in L_COLUMNS_ID
+                else df_summary[column].to_numpy(dtype=float)
+            )
+            for column in df_summary.columns
+        }
+
+        # Write in a temporary file first, then rename
+        fd, path_temp = tempfile.mkstemp(
+            dir=os.path.dirname(path_summary) or ".", prefix=".tmp_", suffix=".npz"
+        )
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, **dic_columns)
+        os.replace(path_temp, path_summary)
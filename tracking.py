@@ -0,0 +1,596 @@
+# ==================================================================================================
+# --- Imports
+# ==================================================================================================
+import collections
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+"""This module runs the tracking-based computations of the dashboard (e.g. footprints) in a pool
+of processes. Each process rebuilds its own copy of the collider once, and then processes all the
+jobs it is given. The xsuite modules are imported in the functions using them, so that the
+constants of this module can be used when serving the dashboard.
+"""
+
+# ==================================================================================================
+# --- Functions to run jobs in a pool of processes
+# ==================================================================================================
+
+# Collider rebuilt in each process of the pool (only defined in the workers)
+_collider_worker = None
+
+
+def return_context(omp_num_threads=1):
+    """Return the CPU context used for tracking, multi-threaded with OpenMP if more than one
+    thread is requested."""
+    import xobjects as xo
+
+    if omp_num_threads > 1:
+        return xo.ContextCpu(omp_num_threads=omp_num_threads)
+    return xo.ContextCpu()
+
+
+def return_context_description(omp_num_threads=1, n_workers=1):
+    """Return a short description of the compute context used for a tracking product."""
+    return f"ContextCpu(omp_num_threads={omp_num_threads}) x {n_workers} worker(s)"
+
+
+def _initialize_worker(collider_dict, omp_num_threads):
+    """Rebuild the collider in the current worker, on the requested context."""
+    import xtrack as xt
+
+    global _collider_worker
+    _collider_worker = xt.Multiline.from_dict(collider_dict)
+    _collider_worker.build_trackers(_context=return_context(omp_num_threads))
+
+
+def run_jobs_in_pool(collider, function, l_jobs, n_workers=None, omp_num_threads="auto"):
+    """Apply function to all the jobs in l_jobs, in a pool of processes each holding a copy of
+    the collider. Each worker tracks with omp_num_threads OpenMP threads ("auto" shares the cores
+    of the node between the workers). The results are returned in the same order as the jobs,
+    along with the description of the context used."""
+    if len(l_jobs) == 0:
+        return [], None
+
+    # Don't start more workers than there are jobs
+    if n_workers is None:
+        n_workers = os.cpu_count()
+    n_workers = min(len(l_jobs), n_workers)
+
+    # Use the cores left idle by the pool for multi-threading
+    if omp_num_threads == "auto":
+        omp_num_threads = max(1, os.cpu_count() // n_workers)
+
+    # The collider is sent once to each worker, not with every job
+    collider_dict = collider.to_dict()
+    with ProcessPoolExecutor(
+        max_workers=n_workers,
+        initializer=_initialize_worker,
+        initargs=(collider_dict, omp_num_threads),
+    ) as executor:
+        l_results = list(executor.map(function, l_jobs))
+
+    return l_results, return_context_description(omp_num_threads, n_workers)
+
+
+# ==================================================================================================
+# --- Functions to compute footprints
+# ==================================================================================================
+def return_footprint(collider, emittance, beam="lhcb1", n_turns=2000):
+    import xtrack as xt
+
+    fp_polar_xm = collider[beam].get_footprint(
+        nemitt_x=emittance,
+        nemitt_y=emittance,
+        n_turns=n_turns,
+        linear_rescale_on_knobs=[xt.LinearRescale(knob_name="beambeam_scale", v0=0.0, dv=0.05)],
+        freeze_longitudinal=True,
+    )
+
+    qx = fp_polar_xm.qx
+    qy = fp_polar_xm.qy
+
+    return qx, qy
+
+
+def _return_footprint_from_job(job):
+    """Compute a footprint in the current worker, with the requested knobs temporarily set."""
+    import xtrack as xt
+
+    beam, dic_knobs, emittance, n_turns = job
+    with xt._temp_knobs(_collider_worker, dic_knobs):
+        return return_footprint(_collider_worker, emittance, beam=beam, n_turns=n_turns)
+
+
+def return_knobs_bb(collider, ip, l_types=("bb_lr", "bb_ho")):
+    """Return the scale_strength knobs of the beam-beam lenses (of the requested types) located
+    at the given IP."""
+    l_names_lenses = []
+    if "bb_lr" in l_types:
+        l_names_lenses += [f"bb_lr.l{ip}", f"bb_lr.r{ip}"]
+    if "bb_ho" in l_types:
+        l_names_lenses += [f"bb_ho.c{ip}", f"bb_ho.l{ip}", f"bb_ho.r{ip}"]
+
+    l_knobs = []
+    for var in collider.vars.keys():
+        if "scale_strength" in var and any(name in var for name in l_names_lenses):
+            l_knobs.append(var)
+    return l_knobs
+
+
+def return_dic_knobs_footprint_decomposition(collider):
+    """Return, for each contribution of the footprint decomposition, the knobs to switch off to
+    isolate it. Returns None if the collider has no beam-beam lenses."""
+    l_knobs_ip_1_5 = return_knobs_bb(collider, 1) + return_knobs_bb(collider, 5)
+    l_knobs_ip_2_8 = return_knobs_bb(collider, 2) + return_knobs_bb(collider, 8)
+    if len(l_knobs_ip_1_5) + len(l_knobs_ip_2_8) == 0:
+        return None
+
+    l_knobs_lr = [x for ip in [1, 2, 5, 8] for x in return_knobs_bb(collider, ip, ("bb_lr",))]
+    l_knobs_ho = [x for ip in [1, 2, 5, 8] for x in return_knobs_bb(collider, ip, ("bb_ho",))]
+
+    return {
+        "All beam-beam": {},
+        "IP 1/5 only": {x: 0.0 for x in l_knobs_ip_2_8},
+        "IP 2/8 only": {x: 0.0 for x in l_knobs_ip_1_5},
+        "Head-on only": {x: 0.0 for x in l_knobs_lr},
+        "Long-range only": {x: 0.0 for x in l_knobs_ho},
+    }
+
+
+# ==================================================================================================
+# --- Functions to group the bunches of the filling scheme in families
+# ==================================================================================================
+
+# Experiments of the beam-beam schedule, and corresponding IPs
+DIC_EXPERIMENTS_IPS = {"ATLAS/CMS": [1, 5], "ALICE": [2], "LHCB": [8]}
+
+# Maximum number of families of bunches (each family requires the tracking of a footprint)
+N_FAMILIES_MAX = 30
+
+# Pattern of the scale_strength knobs of the beam-beam lenses, e.g. bb_lr.r2b2_14_scale_strength
+PATTERN_KNOB_BB = re.compile(r"bb_(lr|ho)\.([lrc])(\d)b(\d)_(\d+)_scale_strength")
+
+
+def return_bunch_families(bbs, n_families_max=N_FAMILIES_MAX):
+    """Group the bunches of a beam-beam schedule in families of bunches sharing the same head-on
+    collisions and the same long-range encounters (positions) in each experiment. If there are more
+    than n_families_max families, the bunches of the least populated ones are given the footprint
+    of the closest remaining family (with the fewest differing encounters), and flagged as
+    approximate. Returns the list of slots, the family of each slot, whether the family of each
+    slot is approximate, and the pattern of each family."""
+    # The exact positions of the encounters are needed to set the beam-beam lenses
+    l_missing = [
+        experiment
+        for experiment in DIC_EXPERIMENTS_IPS
+        if f"Positions in {experiment}" not in bbs.columns
+    ]
+    if len(l_missing) > 0:
+        raise ValueError(
+            f"The beam-beam schedule has no positions of the encounters in {l_missing}, the"
+            " families of bunches can't be built."
+        )
+
+    # Get the (canonical) pattern of encounters of each bunch
+    l_slots = []
+    l_patterns = []
+    for slot, row in bbs.iterrows():
+        l_slots.append(slot)
+        l_patterns.append(
+            tuple(
+                (
+                    bool(row[f"collides in {experiment}"]),
+                    tuple(sorted(int(x) for x in row[f"Positions in {experiment}"])),
+                )
+                for experiment in DIC_EXPERIMENTS_IPS
+            )
+        )
+
+    # Keep the most populated families, and approximate the others by the closest one
+    counter_patterns = collections.Counter(l_patterns)
+    l_patterns_kept = [pattern for pattern, _ in counter_patterns.most_common(n_families_max)]
+    set_patterns_kept = set(l_patterns_kept)
+
+    def return_distance(pattern_1, pattern_2):
+        return sum(
+            len(set(encounters_1) ^ set(encounters_2)) + 1000 * (collides_1 != collides_2)
+            for (collides_1, encounters_1), (collides_2, encounters_2) in zip(pattern_1, pattern_2)
+        )
+
+    dic_families = {pattern: idx for idx, pattern in enumerate(l_patterns_kept)}
+    l_families = []
+    l_approximate = []
+    for pattern in l_patterns:
+        if pattern not in dic_families:
+            pattern_closest = min(
+                l_patterns_kept, key=lambda pattern_kept: return_distance(pattern, pattern_kept)
+            )
+            dic_families[pattern] = dic_families[pattern_closest]
+        l_families.append(dic_families[pattern])
+        l_approximate.append(pattern not in set_patterns_kept)
+
+    return np.array(l_slots), np.array(l_families), np.array(l_approximate), l_patterns_kept
+
+
+def return_dic_knobs_bunch_family(collider, beam, pattern):
+    """Return the knobs to set for the beam-beam lenses of the collider to reproduce the
+    encounters of a given family of bunches. Lenses already switched on are left untouched."""
+    n_beam = beam[-1]
+    dic_knobs = {}
+    for var in collider.vars.keys():
+        match = PATTERN_KNOB_BB.fullmatch(var)
+        if match is None or match.group(4) != n_beam:
+            continue
+        type_lens, side, ip, _, idx = match.groups()
+
+        # Get the pattern of the experiment at the IP of the lens
+        collides, encounters = [
+            pattern_experiment
+            for experiment, pattern_experiment in zip(DIC_EXPERIMENTS_IPS, pattern)
+            if int(ip) in DIC_EXPERIMENTS_IPS[experiment]
+        ][0]
+
+        if type_lens == "ho":
+            on = collides
+        else:
+            # Negative positions are on the left of the IP, positive on the right
+            position = int(idx) if side == "r" else -int(idx)
+            on = position in encounters
+
+        if not on:
+            dic_knobs[var] = 0.0
+        elif collider.varval[var] == 0:
+            dic_knobs[var] = 1.0
+
+    return dic_knobs
+
+
+# ==================================================================================================
+# --- Functions to compute all footprints in a single batch
+# ==================================================================================================
+def return_footprints(
+    collider,
+    emittance,
+    n_turns=2000,
+    decomposition=False,
+    dic_bb_schedules=None,
+    n_workers=None,
+    omp_num_threads="auto",
+):
+    """Return the footprints of both beams and, if requested, their decomposition into the
+    different beam-beam contributions, and the footprints of all the families of bunches of the
+    beam-beam schedules (dictionnary {beam: bbs}). All footprints are computed in a single batch
+    of jobs.
+
+    Two dictionnaries are returned, along with the description of the context used:
+    - {beam: {contribution: (qx, qy)}}, the full footprint being stored under "All beam-beam".
+    - {beam: dic_multibunch}, where dic_multibunch is None if the multi-bunch footprints were not
+      requested, and else contains the footprint of each family, the family of each slot and
+      whether it is approximate (see return_bunch_families).
+    """
+    dic_knobs_contributions = None
+    if decomposition:
+        dic_knobs_contributions = return_dic_knobs_footprint_decomposition(collider)
+    if dic_knobs_contributions is None:
+        dic_knobs_contributions = {"All beam-beam": {}}
+
+    # Build the batch of jobs
+    l_keys = []
+    l_jobs = []
+    for beam in ["lhcb1", "lhcb2"]:
+        for contribution, dic_knobs in dic_knobs_contributions.items():
+            l_keys.append((beam, "contribution", contribution))
+            l_jobs.append((beam, dic_knobs, emittance, n_turns))
+
+    # Add one job per family of bunches if requested
+    dic_multibunch = {"lhcb1": None, "lhcb2": None}
+    if dic_bb_schedules is not None:
+        for beam, bbs in dic_bb_schedules.items():
+            slots, families, approximate, l_patterns = return_bunch_families(bbs)
+            dic_multibunch[beam] = {
+                "slots": slots,
+                "family": families,
+                "approximate": approximate,
+                "footprints": [],
+            }
+            for pattern in l_patterns:
+                l_keys.append((beam, "multibunch", None))
+                l_jobs.append(
+                    (
+                        beam,
+                        return_dic_knobs_bunch_family(collider, beam, pattern),
+                        emittance,
+                        n_turns,
+                    )
+                )
+
+    # Compute all footprints in parallel
+    l_footprints, context = run_jobs_in_pool(
+        collider, _return_footprint_from_job, l_jobs, n_workers, omp_num_threads
+    )
+
+    dic_footprints = {"lhcb1": {}, "lhcb2": {}}
+    for (beam, type_job, contribution), footprint in zip(l_keys, l_footprints):
+        if type_job == "contribution":
+            dic_footprints[beam][contribution] = footprint
+        else:
+            dic_multibunch[beam]["footprints"].append(footprint)
+
+    # Map the tune spread of each family back to the slots
+    for beam, dic in dic_multibunch.items():
+        if dic is not None:
+            array_spread = np.array(
+                [[np.ptp(qx), np.ptp(qy)] for qx, qy in dic["footprints"]]
+            ).reshape(-1, 2)
+            dic["qx_spread"] = array_spread[dic["family"], 0]
+            dic["qy_spread"] = array_spread[dic["family"], 1]
+
+    return dic_footprints, dic_multibunch, context
+
+
+# ==================================================================================================
+# --- Functions for frequency map analysis
+# ==================================================================================================
+
+# Number of iterations of the refinement of the tunes (the search interval shrinks by a factor
+# 0.618 at each iteration, from two FFT bins)
+N_ITERATIONS_TUNE = 40
+
+# Resolution of the tunes (for signals of a few hundred turns or more), used as floor of the tune
+# diffusion (and as lower bound of its color scale in the FMA plots)
+RESOLUTION_TUNE = 1e-7
+
+
+def return_tunes_from_signals(array_signals, n_iterations=N_ITERATIONS_TUNE):
+    """Return the fractional tune of each turn-by-turn signal (one signal per row). As in NAFF,
+    the tune is the frequency maximizing the amplitude of the Hann-windowed Fourier transform of
+    the signal: the peak of the FFT is refined by a golden-section search of this maximum within
+    one FFT bin on each side."""
+    n_turns = array_signals.shape[1]
+
+    # Remove closed orbit and apply a Hann window to reduce spectral leakage
+    array_signals = array_signals - np.mean(array_signals, axis=1, keepdims=True)
+    array_signals = array_signals * np.hanning(n_turns)
+    array_spectra = np.abs(np.fft.rfft(array_signals, axis=1))
+
+    # Get the peak of the spectra, ignoring the constant component
+    idx_peak = np.argmax(array_spectra[:, 1:-1], axis=1) + 1
+
+    # Amplitude of the Fourier transform of each signal at a given frequency (one per signal)
+    array_turns = np.arange(n_turns)
+
+    def return_amplitude(array_tunes):
+        array_phases = np.exp(-2j * np.pi * array_tunes[:, np.newaxis] * array_turns)
+        return np.abs(np.sum(array_signals * array_phases, axis=1))
+
+    # Golden-section search of the maximum between the two neighbouring bins
+    ratio = (np.sqrt(5) - 1) / 2
+    array_low = (idx_peak - 1) / n_turns
+    array_high = (idx_peak + 1) / n_turns
+    array_1 = array_high - ratio * (array_high - array_low)
+    array_2 = array_low + ratio * (array_high - array_low)
+    array_amplitude_1 = return_amplitude(array_1)
+    array_amplitude_2 = return_amplitude(array_2)
+    for _ in range(n_iterations):
+        mask = array_amplitude_1 > array_amplitude_2
+        # The maximum is in [low, x2] where mask, in [x1, high] elsewhere
+        array_high = np.where(mask, array_2, array_high)
+        array_low = np.where(mask, array_low, array_1)
+        array_1, array_2 = (
+            np.where(mask, array_high - ratio * (array_high - array_low), array_2),
+            np.where(mask, array_1, array_low + ratio * (array_high - array_low)),
+        )
+        array_amplitude_new = return_amplitude(np.where(mask, array_1, array_2))
+        array_amplitude_1, array_amplitude_2 = (
+            np.where(mask, array_amplitude_new, array_amplitude_2),
+            np.where(mask, array_amplitude_1, array_amplitude_new),
+        )
+
+    return (array_low + array_high) / 2
+
+
+def _return_fma_from_job(job):
+    """Track a set of particles in the current worker and return their tunes over the two halves
+    of the tracking window."""
+    beam, x_norm, y_norm, emittance, n_turns = job
+    line = _collider_worker[beam]
+    particles = line.build_particles(
+        x_norm=x_norm,
+        px_norm=0,
+        y_norm=y_norm,
+        py_norm=0,
+        nemitt_x=emittance,
+        nemitt_y=emittance,
+    )
+    line.track(particles, num_turns=n_turns, turn_by_turn_monitor=True, freeze_longitudinal=True)
+
+    # Turn-by-turn data is ordered by particle id
+    x = line.record_last_track.x
+    y = line.record_last_track.y
+    particles.sort(interleave_lost_particles=True)
+    lost = particles.state <= 0
+
+    # Compute the tunes in both halves of the tracking window
+    n_half = n_turns // 2
+    l_tunes = []
+    for array in [x[:, :n_half], y[:, :n_half], x[:, n_half:], y[:, n_half:]]:
+        tunes = return_tunes_from_signals(array)
+        tunes[lost] = np.nan
+        l_tunes.append(tunes)
+
+    return l_tunes
+
+
+def return_fma(
+    collider,
+    emittance,
+    n_turns=1024,
+    r_range=(0.5, 8.0),
+    theta_range=(0.05, np.pi / 2 - 0.05),
+    n_r=20,
+    n_theta=10,
+    n_workers=None,
+    omp_num_threads="auto",
+):
+    """Return the frequency map of both beams for a polar grid of initial amplitudes (in beam
+    sigmas). The particles of each beam are split across the workers. The result is a
+    dictionnary {beam: dic_fma}, with the initial normalized amplitudes of the particles, their
+    tunes over the first half of the tracking, and the log10 of their tune diffusion. It is
+    returned along with the description of the context used."""
+    # Build the grid of initial amplitudes
+    array_r, array_theta = np.meshgrid(
+        np.linspace(*r_range, n_r), np.linspace(*theta_range, n_theta), indexing="ij"
+    )
+    x_norm = (array_r * np.cos(array_theta)).ravel()
+    y_norm = (array_r * np.sin(array_theta)).ravel()
+
+    # Split the particles of both beams across the workers
+    n_workers_max = n_workers if n_workers is not None else os.cpu_count()
+    n_chunks = max(1, n_workers_max // 2)
+    l_keys = []
+    l_jobs = []
+    for beam in ["lhcb1", "lhcb2"]:
+        for x_chunk, y_chunk in zip(
+            np.array_split(x_norm, n_chunks), np.array_split(y_norm, n_chunks)
+        ):
+            if len(x_chunk) > 0:
+                l_keys.append(beam)
+                l_jobs.append((beam, x_chunk, y_chunk, emittance, n_turns))
+
+    l_results, context = run_jobs_in_pool(
+        collider, _return_fma_from_job, l_jobs, n_workers, omp_num_threads
+    )
+
+    dic_fma = {}
+    for beam in ["lhcb1", "lhcb2"]:
+        qx_1, qy_1, qx_2, qy_2 = [
+            np.concatenate([result[i] for key, result in zip(l_keys, l_results) if key == beam])
+            for i in range(4)
+        ]
+        # Floor the diffusion at the resolution of the tunes, below which it is meaningless
+        diffusion = np.log10(
+            np.maximum(np.sqrt((qx_2 - qx_1) ** 2 + (qy_2 - qy_1) ** 2), RESOLUTION_TUNE)
+        )
+        dic_fma[beam] = {
+            "x_norm": x_norm,
+            "y_norm": y_norm,
+            "qx": qx_1,
+            "qy": qy_1,
+            "diffusion": diffusion,
+        }
+
+    return dic_fma, context
+
+
+# ==================================================================================================
+# --- Functions for a quick dynamic aperture estimate
+# ==================================================================================================
+
+# Flags of the angles whose DA is out of the range of amplitudes scanned
+FLAG_DA_STABLE = 1
+FLAG_DA_UNSTABLE = -1
+
+
+def _return_survival(line, array_angles, array_r, emittance, n_turns):
+    """Return whether the particles launched at the given angles and amplitudes (in beam sigmas)
+    survive n_turns turns."""
+    particles = line.build_particles(
+        x_norm=array_r * np.cos(array_angles),
+        px_norm=0,
+        y_norm=array_r * np.sin(array_angles),
+        py_norm=0,
+        nemitt_x=emittance,
+        nemitt_y=emittance,
+    )
+    line.track(particles, num_turns=n_turns, freeze_longitudinal=True)
+    particles.sort(interleave_lost_particles=True)
+    return particles.state > 0
+
+
+def _return_da_from_job(job):
+    """Find, in the current worker, the dynamic aperture along a set of angles. A survival scan on
+    a grid of amplitudes first brackets the boundary along each angle, which is then refined by
+    bisection inside the bracket. All angles are tracked together at each step. Returns the DA and
+    the flag (see return_da) of each angle."""
+    beam, array_angles, array_r_grid, n_bisections, emittance, n_turns = job
+    line = _collider_worker[beam]
+
+    # Survival scan on the polar grid (one row per angle)
+    array_survived = _return_survival(
+        line,
+        np.repeat(array_angles, len(array_r_grid)),
+        np.tile(array_r_grid, len(array_angles)),
+        emittance,
+        n_turns,
+    ).reshape(len(array_angles), len(array_r_grid))
+
+    # The boundary is bracketed by the last stable amplitude before the first lost one. The angles
+    # stable up to the last amplitude, or lost from the first one, are flagged
+    n_amplitudes = len(array_r_grid)
+    array_lost = ~array_survived
+    idx_lost = np.where(array_lost.any(axis=1), array_lost.argmax(axis=1), n_amplitudes)
+    array_flags = np.select(
+        [idx_lost == n_amplitudes, idx_lost == 0], [FLAG_DA_STABLE, FLAG_DA_UNSTABLE], 0
+    )
+    bracketed = array_flags == 0
+    r_low = array_r_grid[np.clip(idx_lost - 1, 0, n_amplitudes - 1)]
+    r_high = array_r_grid[np.clip(idx_lost, 0, n_amplitudes - 1)]
+
+    # Bisect inside the brackets found
+    if bracketed.any():
+        for _ in range(n_bisections):
+            r_mid = (r_low[bracketed] + r_high[bracketed]) / 2
+            survived = _return_survival(line, array_angles[bracketed], r_mid, emittance, n_turns)
+            r_low[bracketed] = np.where(survived, r_mid, r_low[bracketed])
+            r_high[bracketed] = np.where(survived, r_high[bracketed], r_mid)
+
+    return r_low, array_flags
+
+
+def return_da(
+    collider,
+    emittance,
+    n_turns=1000,
+    r_range=(2.0, 20.0),
+    n_angles=11,
+    n_amplitudes=10,
+    n_bisections=5,
+    n_workers=None,
+    omp_num_threads="auto",
+):
+    """Return a quick estimate of the dynamic aperture (in beam sigmas) of both beams, for
+    n_angles angles in the (x, y) plane, from a survival scan on n_amplitudes amplitudes in
+    r_range followed by a bisection inside the bracket found along each angle. The angles of each
+    beam are split across the workers. The result is a dictionnary {beam: array}, each array
+    having one row (angle, DA, flag) per angle, where the flag is FLAG_DA_STABLE if the angle is
+    still stable at r_range[1] (the DA is then a lower bound), FLAG_DA_UNSTABLE if it's already
+    unstable at r_range[0] (the DA is then an upper bound), and 0 otherwise. It is returned along
+    with the description of the context used."""
+    array_angles = np.linspace(0, np.pi / 2, n_angles + 2)[1:-1]
+    array_r_grid = np.linspace(r_range[0], r_range[1], n_amplitudes)
+
+    # Split the angles of both beams across the workers
+    n_workers_max = n_workers if n_workers is not None else os.cpu_count()
+    n_chunks = max(1, min(n_angles, n_workers_max // 2))
+    l_keys = []
+    l_jobs = []
+    for beam in ["lhcb1", "lhcb2"]:
+        for chunk in np.array_split(array_angles, n_chunks):
+            if len(chunk) > 0:
+                l_keys.append(beam)
+                l_jobs.append((beam, chunk, array_r_grid, n_bisections, emittance, n_turns))
+
+    l_results, context = run_jobs_in_pool(
+        collider, _return_da_from_job, l_jobs, n_workers, omp_num_threads
+    )
+
+    dic_da = {}
+    for beam in ["lhcb1", "lhcb2"]:
+        l_results_beam = [result for key, result in zip(l_keys, l_results) if key == beam]
+        array_da = np.concatenate([array_da for array_da, _ in l_results_beam])
+        array_flags = np.concatenate([array_flags for _, array_flags in l_results_beam])
+        dic_da[beam] = np.stack([array_angles, array_da, array_flags], axis=1)
+
+    return dic_da, context